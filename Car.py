@@ -1,100 +1,233 @@
-from typing import List, Dict, Optional
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Iterable, List, Dict, NamedTuple, Optional, Tuple, Union
 from db_manager import DatabaseManager
 
+# Seconds a worker trusts its availability snapshot before re-checking the
+# database fleet version for changes made by other workers
+FLEET_CACHE_TTL = float(os.getenv('FLEET_CACHE_TTL', '2'))
+
+class CarCard(NamedTuple):
+    """What a car card shows: the snapshot keeps these instead of ORM objects"""
+    name: str
+    image: Optional[str]
+    is_available: bool = True
+
 class RentalCars:
-    def __init__(self, initial_cars: List[str]) -> None:
-        # Initialize database manager
-        self.db_manager = DatabaseManager()
+    def __init__(self, initial_cars: Union[Iterable[str], Dict[str, Optional[str]]], db_manager_factory: Optional[Callable[[], DatabaseManager]] = None) -> None:
+        # Optional provider of a shared (e.g. request-scoped) database manager.
+        # When set, the provider owns the manager's lifetime and we never close it.
+        self.db_manager_factory = db_manager_factory
         
-        # Add initial cars to database if they don't exist
-        for car_name in initial_cars:
-            self.db_manager.get_or_create_car(car_name)
+        # Initial cars are added to the database on first database use, so
+        # constructing RentalCars (e.g. at app import) never touches the database
+        # Either names or a {name: image} mapping (see DatabaseManager.ensure_cars)
+        self._initial_cars = initial_cars if isinstance(initial_cars, dict) else list(initial_cars)
+        self._seeded = False
         
         # Public attribute name kept as 'Cars' to match existing usage in app.py
         self.Cars: List[str] = list(initial_cars)
+        
+        # In-process snapshot of available cars, tagged with the fleet
+        # version it was read at. _fleet_lock only guards reading and swapping
+        # it; reloads are serialized by _refresh_lock, so readers never wait
+        # on a query. _fleet_generation counts local invalidations, so a
+        # reload that raced one is not kept.
+        self._fleet_lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._available_cars: Optional[List[CarCard]] = None
+        self._fleet_version: Optional[int] = None
+        self._fleet_checked_at = 0.0
+        self._fleet_generation = 0
 
-    def borrowCars(self, borrower_name: str, car_name: str, user_id: Optional[int] = None) -> bool:
+    @contextmanager
+    def _db(self):
+        """Yield the shared database manager, or a private one closed on exit"""
+        if self.db_manager_factory is not None:
+            db_manager = self.db_manager_factory()
+            self._seed(db_manager)
+            yield db_manager
+            return
         # Create a new database manager for this operation to avoid thread issues
         db_manager = DatabaseManager()
         try:
+            self._seed(db_manager)
+            yield db_manager
+        finally:
+            db_manager.close()
+
+    @property
+    def is_seeded(self) -> bool:
+        """Whether the initial cars have been added to the database by this instance"""
+        return self._seeded
+
+    def _seed(self, db_manager: DatabaseManager) -> None:
+        """Add initial cars to database if they don't exist (once per instance)"""
+        if not self._seeded:
+            db_manager.ensure_cars(self._initial_cars)
+            self._seeded = True
+
+    def _invalidate_fleet(self) -> None:
+        """Drop the availability snapshot after a local fleet change"""
+        with self._fleet_lock:
+            self._available_cars = None
+            self._fleet_generation += 1
+
+    def borrowCars(self, borrower_name: str, car_name: str, user_id: Optional[int] = None) -> bool:
+        with self._db() as db_manager:
             # Use database manager to handle borrowing with user association
             success = db_manager.borrow_car(borrower_name, car_name, user_id)
             if success:
+                self._invalidate_fleet()
                 # Update local Cars list to maintain compatibility
                 if car_name in self.Cars:
                     self.Cars.remove(car_name)
             return success
-        finally:
-            db_manager.close()
 
     def returnCars(self, borrower_name: str, car_name: str) -> bool:
-        # Create a new database manager for this operation to avoid thread issues
-        db_manager = DatabaseManager()
-        try:
+        with self._db() as db_manager:
             # Use database manager to handle returning
             success = db_manager.return_car(borrower_name, car_name)
             if success:
+                self._invalidate_fleet()
                 # Update local Cars list to maintain compatibility
                 if car_name not in self.Cars:
                     self.Cars.append(car_name)
             return success
-        finally:
-            db_manager.close()
+
+    def borrowCarsBatch(self, pairs: List[Tuple[str, str]], user_id: Optional[int] = None) -> List[Dict]:
+        """Borrow many (borrower_name, car_name) pairs in one transaction, with per-item results"""
+        with self._db() as db_manager:
+            results = db_manager.borrow_cars(pairs, user_id)
+            if any(result['success'] for result in results):
+                self._invalidate_fleet()
+            for result in results:
+                if result['success'] and result['car_name'] in self.Cars:
+                    self.Cars.remove(result['car_name'])
+            return results
+
+    def returnCarsBatch(self, pairs: List[Tuple[str, str]]) -> List[Dict]:
+        """Return many (borrower_name, car_name) pairs in one transaction, with per-item results"""
+        with self._db() as db_manager:
+            results = db_manager.return_cars(pairs)
+            if any(result['success'] for result in results):
+                self._invalidate_fleet()
+            for result in results:
+                if result['success'] and result['car_name'] not in self.Cars:
+                    self.Cars.append(result['car_name'])
+            return results
 
     def donateCars(self, donor_name: str, car_name: str) -> bool:
-        # Create a new database manager for this operation to avoid thread issues
-        db_manager = DatabaseManager()
-        try:
+        with self._db() as db_manager:
             # Use database manager to handle donation
             success = db_manager.donate_car(donor_name, car_name)
+            if success:
+                self._invalidate_fleet()
             if success and car_name not in self.Cars:
                 self.Cars.append(car_name)
             return success
-        finally:
-            db_manager.close()
 
     def get_borrowed_cars(self, user_id: Optional[int] = None):
         """Get borrowed cars, optionally filtered by user"""
-        db_manager = DatabaseManager()
-        try:
+        with self._db() as db_manager:
             if user_id:
                 return db_manager.get_borrowed_cars_by_user(user_id)
             else:
                 return db_manager.get_borrowed_cars()
-        finally:
-            db_manager.close()
     
-    def get_returned_cars(self, user_id: Optional[int] = None):
-        """Get returned cars, optionally filtered by user"""
-        db_manager = DatabaseManager()
-        try:
+    def get_returned_cars(self, user_id: Optional[int] = None, limit: Optional[int] = None, cursor: Optional[str] = None,
+                          all_history: bool = False):
+        """Get recent (or, with all_history, all) returned cars newest first, optionally filtered by user and paginated"""
+        with self._db() as db_manager:
             if user_id:
-                return db_manager.get_returned_cars_by_user(user_id)
+                return db_manager.get_returned_cars_by_user(user_id, limit, cursor, all_history)
             else:
-                return db_manager.get_returned_cars()
-        finally:
-            db_manager.close()
+                return db_manager.get_returned_cars(limit, cursor, all_history)
     
-    def get_donated_cars(self):
-        """Get all donated cars from database"""
-        db_manager = DatabaseManager()
-        try:
-            return db_manager.get_donated_cars()
-        finally:
-            db_manager.close()
+    def get_donated_cars(self, limit: Optional[int] = None, cursor: Optional[str] = None):
+        """Get donated cars newest first, optionally paginated"""
+        with self._db() as db_manager:
+            return db_manager.get_donated_cars(limit, cursor)
+    
+    def get_rental_summary(self, user_id: int):
+        """Get a user's precomputed rental totals"""
+        with self._db() as db_manager:
+            return db_manager.get_rental_summary(user_id)
     
     def get_available_cars(self):
         """Get all available cars from database"""
-        db_manager = DatabaseManager()
-        try:
-            # Ensure initial cars are in the database
-            for car_name in self.Cars:
-                db_manager.get_or_create_car(car_name)
+        with self._db() as db_manager:
+            # _db() seeds the catalog on first use
             return db_manager.get_available_cars()
-        finally:
-            db_manager.close()
+
+    def get_available_car_cards(self) -> List[CarCard]:
+        """Get the available cars from the in-process snapshot.
+        
+        The snapshot is dropped on local borrow/return/donate and otherwise
+        revalidated against the database fleet version at most once every
+        FLEET_CACHE_TTL seconds, so browsing pages rarely hit the database.
+        """
+        cars = self.cached_available_car_cards()
+        if cars is not None:
+            return cars
+        with self._refresh_lock:
+            # Another thread may have reloaded it while this one waited
+            cars = self.cached_available_car_cards()
+            if cars is not None:
+                return cars
+            with self._fleet_lock:
+                cached, cached_version = self._available_cars, self._fleet_version
+                generation = self._fleet_generation
+            with self._db() as db_manager:
+                # From the primary: a lagging replica would cache stale
+                # availability under the current version
+                db_manager.use_primary()
+                # Read the version first: a change committed in between only
+                # makes the snapshot look older than it is
+                version = db_manager.get_fleet_version()
+                if cached is None or version != cached_version:
+                    cached = [CarCard(car.name, car.image) for car in db_manager.get_available_cars()]
+            with self._fleet_lock:
+                if generation == self._fleet_generation:
+                    self._available_cars = cached
+                    self._fleet_version = version
+                    self._fleet_checked_at = time.monotonic()
+            return list(cached)
+
+    def get_available_car_names(self) -> List[str]:
+        """Get names of available cars from the in-process snapshot"""
+        return [car.name for car in self.get_available_car_cards()]
+
+    def cached_available_car_cards(self, version: Optional[int] = None) -> Optional[List[CarCard]]:
+        """Get the availability snapshot without touching the database.
+        
+        Without version, returns it only while it is within FLEET_CACHE_TTL.
+        With the current fleet version, returns it if it was read at that
+        version (restarting the TTL). Returns None when it must be reloaded.
+        For callers that read the database themselves, e.g. the ASGI app.
+        """
+        with self._fleet_lock:
+            if self._available_cars is None:
+                return None
+            if version is None:
+                if time.monotonic() - self._fleet_checked_at >= FLEET_CACHE_TTL:
+                    return None
+            elif version != self._fleet_version:
+                return None
+            else:
+                self._fleet_checked_at = time.monotonic()
+            return list(self._available_cars)
+
+    def store_available_car_cards(self, version: int, cars: List[CarCard]) -> None:
+        """Replace the availability snapshot with cars read at version"""
+        with self._fleet_lock:
+            self._available_cars = list(cars)
+            self._fleet_version = version
+            self._fleet_checked_at = time.monotonic()
 
 
 class Person:
     def __init__(self, name: str = "") -> None:
-        self.name = name
\ No newline at end of file
+        self.name = name
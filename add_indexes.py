@@ -0,0 +1,20 @@
+#!/usr/bin/env python3
+"""
+Add missing indexes to an existing database
+"""
+
+from db_manager import create_missing_indexes
+
+def add_indexes():
+    print("Adding missing indexes to database...")
+    
+    created = create_missing_indexes()
+    if created:
+        for index_name in created:
+            print(f"  - Created {index_name}")
+        print(f"{len(created)} index(es) created successfully!")
+    else:
+        print("All indexes already exist.")
+
+if __name__ == "__main__":
+    add_indexes()
@@ -0,0 +1,183 @@
+"""
+Versioned JSON API (/api/v1) for the car rental service.
+
+Backed by the same RentalCars/DatabaseManager calls as the HTML views, but
+records are serialized straight to plain dicts instead of being rendered
+through templates.
+"""
+
+import hmac
+from flask import Blueprint, Response, current_app, jsonify, request, session, abort, stream_with_context
+from werkzeug.exceptions import HTTPException
+from db_manager import next_cursor
+from extensions import rental, get_history_args
+import export
+
+api = Blueprint('api', __name__, url_prefix='/api/v1')
+
+# Upper bound on items accepted by the batch endpoints
+BATCH_MAX_ITEMS = 1000
+
+def _isoformat(value):
+    return value.isoformat() if value is not None else None
+
+def serialize_borrowed(record):
+    return {
+        'id': record.id,
+        'car_name': record.car.name,
+        'borrower_name': record.borrower.name,
+        'borrowed_at': _isoformat(record.borrowed_at),
+    }
+
+def serialize_returned(record):
+    return {
+        'id': record.id,
+        'car_name': record.car.name,
+        'borrower_name': record.borrower.name,
+        'borrowed_at': _isoformat(record.borrowed_at),
+        'returned_at': _isoformat(record.returned_at),
+    }
+
+def serialize_donated(record):
+    return {
+        'id': record.id,
+        'car_name': record.car_name,
+        'donor_name': record.donor_name,
+        'donated_at': _isoformat(record.donated_at),
+    }
+
+def _json_object():
+    """The JSON request body, None without one; 400 if it is not an object"""
+    data = request.get_json(silent=True)
+    if data is not None and not isinstance(data, dict):
+        abort(400, description="request body must be a JSON object")
+    return data
+
+def _require_fields(*names):
+    """Read required string fields from a JSON (or form) request body"""
+    data = _json_object()
+    if data is None:
+        data = request.form
+    values = []
+    for name in names:
+        value = data.get(name)
+        if not isinstance(value, str) or not value.strip():
+            abort(400, description=f"'{name}' is required")
+        values.append(value.strip())
+    return values
+
+@api.errorhandler(HTTPException)
+def handle_http_error(error):
+    """Report errors as JSON rather than HTML error pages"""
+    return jsonify(error=error.description), error.code
+
+@api.route('/cars')
+def available_cars():
+    return jsonify(cars=rental.get_available_car_names())
+
+@api.route('/borrow', methods=['POST'])
+def borrow():
+    borrower_name, car_name = _require_fields('borrower_name', 'car_name')
+    if not rental.borrowCars(borrower_name, car_name, session.get('user_id')):
+        return jsonify(success=False, error=f"{car_name} is not available"), 409
+    return jsonify(success=True, borrower_name=borrower_name, car_name=car_name)
+
+@api.route('/return', methods=['POST'])
+def return_car():
+    borrower_name, car_name = _require_fields('borrower_name', 'car_name')
+    if not rental.returnCars(borrower_name, car_name):
+        return jsonify(success=False, error=f"{car_name} is not borrowed by {borrower_name}"), 409
+    return jsonify(success=True, borrower_name=borrower_name, car_name=car_name)
+
+def _batch_pairs():
+    """Read {"items": [{"borrower_name": ..., "car_name": ...}, ...]} from the request"""
+    data = _json_object() or {}
+    items = data.get('items')
+    if not isinstance(items, list) or not items:
+        abort(400, description="'items' must be a non-empty list")
+    if len(items) > BATCH_MAX_ITEMS:
+        abort(400, description=f"at most {BATCH_MAX_ITEMS} items per batch")
+    pairs = []
+    for index, item in enumerate(items):
+        if not isinstance(item, dict):
+            abort(400, description=f"item {index} must be an object")
+        borrower_name, car_name = item.get('borrower_name'), item.get('car_name')
+        if not isinstance(borrower_name, str) or not borrower_name.strip() \
+                or not isinstance(car_name, str) or not car_name.strip():
+            abort(400, description=f"item {index} needs 'borrower_name' and 'car_name'")
+        pairs.append((borrower_name.strip(), car_name.strip()))
+    return pairs
+
+def _batch_response(results):
+    succeeded = sum(1 for result in results if result['success'])
+    return jsonify(results=results, succeeded=succeeded, failed=len(results) - succeeded)
+
+@api.route('/borrow/batch', methods=['POST'])
+def borrow_batch():
+    """Borrow many cars in one transaction; each item succeeds or fails on its own"""
+    return _batch_response(rental.borrowCarsBatch(_batch_pairs(), session.get('user_id')))
+
+@api.route('/return/batch', methods=['POST'])
+def return_batch():
+    """Return many cars in one transaction; each item succeeds or fails on its own"""
+    return _batch_response(rental.returnCarsBatch(_batch_pairs()))
+
+@api.route('/donate', methods=['POST'])
+def donate():
+    donor_name, car_name = _require_fields('donor_name', 'car_name')
+    rental.donateCars(donor_name, car_name)
+    return jsonify(success=True, donor_name=donor_name, car_name=car_name), 201
+
+def history_response(args, borrowed_records, returned_records, donated_records):
+    """The /history JSON for the HistoryArgs args (shared with asgi.py)"""
+    return jsonify(
+        borrowed=[serialize_borrowed(r) for r in borrowed_records],
+        returned={
+            'items': [serialize_returned(r) for r in returned_records],
+            'next_cursor': next_cursor(returned_records, args.limit, 'returned_at'),
+        },
+        donated={
+            'items': [serialize_donated(r) for r in donated_records],
+            'next_cursor': next_cursor(donated_records, args.limit, 'donated_at'),
+        },
+    )
+
+@api.route('/history')
+def history():
+    """Borrowed cars plus paginated returned/donated history (the logged in user's only, if any)"""
+    args = get_history_args()
+    return history_response(
+        args,
+        rental.get_borrowed_cars(args.user_id),
+        rental.get_returned_cars(args.user_id, args.limit, args.returned_cursor, args.all_history),
+        rental.get_donated_cars(args.limit, args.donated_cursor),
+    )
+
+def _require_export_token():
+    """Check the Authorization: Bearer token against EXPORT_API_TOKEN"""
+    token = current_app.config.get('EXPORT_API_TOKEN')
+    if not token:
+        abort(404)
+    supplied = request.headers.get('Authorization', '')
+    if not hmac.compare_digest(supplied.encode(), f"Bearer {token}".encode()):
+        abort(401, description='a valid export token is required')
+
+@api.route('/export/<table>')
+def export_history(table):
+    """Stream a whole history table as CSV or NDJSON (?format=, ?since=, ?until=)"""
+    _require_export_token()
+    fmt = request.args.get('format', 'csv')
+    if table not in export.TABLES:
+        abort(404)
+    if fmt not in export.FORMATS:
+        abort(400, description=f"format must be one of {', '.join(export.FORMATS)}")
+    try:
+        since = export.parse_date(request.args.get('since'))
+        until = export.parse_date(request.args.get('until'))
+    except ValueError:
+        abort(400, description='since and until must be ISO 8601 dates')
+    return Response(
+        stream_with_context(export.export_history(table, fmt, since, until)),
+        mimetype=export.FORMATS[fmt],
+        headers={'Content-Disposition': f'attachment; filename="{table}_cars.{fmt}"'},
+    )
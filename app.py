@@ -1,98 +1,101 @@
-from flask import Flask, render_template, request, redirect, flash, session, url_for
-from werkzeug.utils import secure_filename
+from flask import Blueprint, Flask, render_template, request, redirect, flash, session, url_for, current_app
 import os
-import random
-import string
-import requests
-import time
-from Car import RentalCars, Person
-
-app = Flask(__name__, template_folder='.')
-app.secret_key = 'dev-secret-change-me'
-
-# Configuration for file uploads
-app.config['UPLOAD_FOLDER'] = os.path.join('static', 'uploads')
-app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max file size
-
-# Ensure upload folder exists
-os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
+import uuid
+from Car import Person
+from db_manager import next_cursor
+from extensions import (rental, get_db_manager, close_db_manager, remember_primary,
+                        get_current_user, get_history_args)
+from api import api
+from commands import (init_db_command, batch_command, archive_command, rebuild_summaries_command, export_command,
+                      import_command, purge_command, images_command, jobs_command, assets_command,
+                      car_images_command)
+import assets
+import fragments
+import images
+import jobs
+import metrics
 
 # Allowed file extensions for profile pictures
 ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif'}
 
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 
+main = Blueprint('main', __name__)
+
 # Helper function to check if file extension is allowed
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
-# Initialize car rental system
-rental = RentalCars([
-    "ORACLE REDBULL RB20",
-    "AMG GLS",
-    "FERRARI 296 GTB",
-    "APX GP",
-    "MCLAREN 720S",
-    "LAMBORGHINI HURACÁN",
-    "BUGATTI CHIRON",
-    "ASTON MARTIN VANTAGE",
-    "PORSCHE 911",
-    "BMW M3",
-    "AUDI R8"
-])
+def _discard(path):
+    """Delete an upload that will not be processed"""
+    if path and os.path.exists(path):
+        os.remove(path)
+
+def image_variant(path, variant, fmt='jpg'):
+    """Template helper: static path of a resized variant of path, or None (see images.py)"""
+    return images.image_variant(current_app.static_folder, path, variant, fmt)
+
 person = Person()
 
-# Mapping of car names to image files in static/cars/
-# Files present: mclaren-720s.svg, ferrari-296-gtb.svg, lamborghini-huracan.svg, bugatti-chiron.svg, apx gp.jpg, image.png
-car_images = {
-    # Prefer user-provided local images by exact filename
-    "ORACLE REDBULL RB20": "ORACLE REDBULL RB20.jpg",
-    "AMG GLS": "AMG GLS.jpeg",
-    "FERRARI 296 GTB": "FERRARI 296 GTB.jpg",
-    "APX GP": "apx gp.jpg",
-    "MCLAREN 720S": "MCLAREN 720S.jpeg",
-    "LAMBORGHINI HURACÁN": "LAMBORGHINI HURACÁN.jpeg",
-    "BUGATTI CHIRON": "BUGATTI CHIRON.jpeg",
-    "ASTON MARTIN VANTAGE": "https://upload.wikimedia.org/wikipedia/commons/thumb/5/5a/2019_Aston_Martin_Vantage_V8_Automatic_4.0_Front.jpg/640px-2019_Aston_Martin_Vantage_V8_Automatic_4.0_Front.jpg",
-    "PORSCHE 911": "PORSCHE 911.jpeg",
-    "BMW M3": "BMW M3.jpeg",
-    "AUDI R8": "AUDI R8.jpeg"
-    # Unmapped names will fall back to image.png automatically
-}
+# Page builders shared with the async views in asgi.py, which fetch the same
+# data through AsyncDatabaseManager; only the fetching differs between them
+
+def home_page(cars, user):
+    return render_template('home.html', cars=cars, user=user)
+
+def list_page(cars, user):
+    return render_template('list.html', cars=cars, user=user)
 
-@app.route('/')
+def borrow_page(car_names, user):
+    return render_template('borrow.html', cars=car_names, user=user)
+
+def return_page(borrowed_records, user):
+    borrowed_cars = []
+    for record in borrowed_records:
+        borrower = record.borrower
+        car = record.car
+        borrowed_cars.append({
+            'borrower_name': borrower.name,
+            'car_name': car.name
+        })
+    return render_template('return.html', borrowed_cars=borrowed_cars, user=user)
+
+def track_page(args, user, summary, borrowed_records, returned_records, donated_records):
+    """Render /track for the HistoryArgs args (see get_history_args)"""
+    return render_template('track.html', 
+                          summary=summary,
+                          borrowed_records=borrowed_records, 
+                          returned_records=returned_records, 
+                          donated_records=donated_records,
+                          next_returned_cursor=next_cursor(returned_records, args.limit, 'returned_at'),
+                          next_donated_cursor=next_cursor(donated_records, args.limit, 'donated_at'),
+                          limit=args.limit,
+                          all_history=args.all_history,
+                          user=user)
+
+def profile_page(user, summary):
+    return render_template('profile.html', user=user, summary=summary)
+
+def login_redirect():
+    """Send a visitor without a valid login to /login (from /profile)"""
+    if 'user_id' in session:
+        session.pop('user_id', None)
+        flash('User not found. Please log in again.', 'error')
+    else:
+        flash('Please log in to view your profile.', 'error')
+    return redirect('/login')
+
+@main.route('/')
 def home():
-    # Create a new database manager for this request to avoid thread issues
-    from db_manager import DatabaseManager
-    db_manager = DatabaseManager()
-    try:
-        # Get available cars from database
-        available_cars = [car.name for car in db_manager.get_available_cars()]
-        # Get current user if logged in
-        user = None
-        if 'user_id' in session:
-            user = db_manager.get_user_by_id(session['user_id'])
-        return render_template('home.html', cars=available_cars, car_images=car_images, user=user)
-    finally:
-        db_manager.close()
+    # Get available cars from the cached fleet snapshot
+    return home_page(rental.get_available_car_cards(), get_current_user())
 
-@app.route('/list')
+@main.route('/list')
 def list_cars():
-    # Create a new database manager for this request to avoid thread issues
-    from db_manager import DatabaseManager
-    db_manager = DatabaseManager()
-    try:
-        # Get available cars from database
-        available_cars = [car.name for car in db_manager.get_available_cars()]
-        # Get current user if logged in
-        user = None
-        if 'user_id' in session:
-            user = db_manager.get_user_by_id(session['user_id'])
-        return render_template('list.html', cars=available_cars, car_images=car_images, user=user)
-    finally:
-        db_manager.close()
+    # Get available cars from the cached fleet snapshot
+    return list_page(rental.get_available_car_cards(), get_current_user())
 
-@app.route('/borrow', methods=['GET', 'POST'])
+@main.route('/borrow', methods=['GET', 'POST'])
 def borrow():
     if request.method == 'POST':
         name = request.form['name']
@@ -107,21 +110,10 @@ def borrow():
         else:
             flash(f"{car_name} is not available", 'error')
         return redirect('/track')
-    # Create a new database manager for this request to avoid thread issues
-    from db_manager import DatabaseManager
-    db_manager = DatabaseManager()
-    try:
-        # Get available cars from database
-        available_cars = [car.name for car in db_manager.get_available_cars()]
-        # Get current user if logged in
-        user = None
-        if 'user_id' in session:
-            user = db_manager.get_user_by_id(session['user_id'])
-        return render_template('borrow.html', cars=available_cars, user=user)
-    finally:
-        db_manager.close()
+    # Get available cars from the cached fleet snapshot
+    return borrow_page(rental.get_available_car_names(), get_current_user())
 
-@app.route('/return', methods=['GET', 'POST'])
+@main.route('/return', methods=['GET', 'POST'])
 def return_car():
     if request.method == 'POST':
         name = request.form['name']
@@ -136,109 +128,60 @@ def return_car():
     # Get borrowed cars for the return form
     # If user is logged in, only show their borrowed cars
     user_id = session['user_id'] if 'user_id' in session else None
-    borrowed_records = rental.get_borrowed_cars(user_id)
-    borrowed_cars = []
-    for record in borrowed_records:
-        borrower = record.borrower
-        car = record.car
-        borrowed_cars.append({
-            'borrower_name': borrower.name,
-            'car_name': car.name
-        })
-    
-    # Get current user if logged in
-    user = None
-    if 'user_id' in session:
-        from db_manager import DatabaseManager
-        db_manager = DatabaseManager()
-        try:
-            user = db_manager.get_user_by_id(session['user_id'])
-        finally:
-            db_manager.close()
-    
-    return render_template('return.html', borrowed_cars=borrowed_cars, car_images=car_images, user=user)
+    return return_page(rental.get_borrowed_cars(user_id), get_current_user())
 
-@app.route('/track')
+@main.route('/track')
 def track_cars():
     # Get current user if logged in
-    user = None
-    user_id = None
-    if 'user_id' in session:
-        from db_manager import DatabaseManager
-        db_manager = DatabaseManager()
-        try:
-            user = db_manager.get_user_by_id(session['user_id'])
-            user_id = session['user_id']  # Use the session ID directly
-        finally:
-            db_manager.close()
+    user = get_current_user()
+    
+    # History is paginated with opaque cursors on (returned_at, id) / (donated_at, id)
+    args = get_history_args()
     
     # Get borrowed, returned, and donated cars
     # If user is logged in, only show their data
-    borrowed_records = rental.get_borrowed_cars(user_id)
-    returned_records = rental.get_returned_cars(user_id)
-    donated_records = rental.get_donated_cars()
+    borrowed_records = rental.get_borrowed_cars(args.user_id)
+    returned_records = rental.get_returned_cars(args.user_id, args.limit, args.returned_cursor, args.all_history)
+    donated_records = rental.get_donated_cars(args.limit, args.donated_cursor)
     
-    return render_template('track.html', 
-                          borrowed_records=borrowed_records, 
-                          returned_records=returned_records, 
-                          donated_records=donated_records,
-                          car_images=car_images,
-                          user=user)
+    # Totals come from the maintained per-user summary, not the history
+    summary = rental.get_rental_summary(args.user_id) if args.user_id else None
+    
+    return track_page(args, user, summary, borrowed_records, returned_records, donated_records)
 
 # User login route
-@app.route('/login', methods=['GET', 'POST'])
+@main.route('/login', methods=['GET', 'POST'])
 def login():
-    print(f"Login route accessed with method: {request.method}")
     if request.method == 'POST':
         try:
-            print("Processing POST request")
             email = request.form['email']
-            print(f"Email from form: {email}")
             
             # Find user by email
-            from db_manager import DatabaseManager
-            db_manager = DatabaseManager()
+            db_manager = get_db_manager()
             try:
-                print("Attempting to get user by email")
                 user = db_manager.get_user_by_email(email)
-                print(f"User lookup result: {user}")
                 if user:
                     # Store user ID in session
                     session['user_id'] = user.id
-                    print(f"User ID {user.id} stored in session")
                     flash(f"Welcome back, {user.name}!", 'success')
                     return redirect('/')
                 else:
                     flash('No account found with that email. Please register.', 'error')
                     return redirect('/register')
             except Exception as e:
-                print(f"Database error: {str(e)}")
+                current_app.logger.exception("Database error during login")
                 flash(f"Error logging in: {str(e)}", 'error')
                 return redirect('/login')
-            finally:
-                db_manager.close()
         except Exception as e:
             # Log the exception for debugging
-            print(f"Exception in login POST: {str(e)}")
-            import traceback
-            traceback.print_exc()
+            current_app.logger.exception("Exception in login POST")
             flash(f"Error processing login: {str(e)}", 'error')
             return redirect('/login')
     
-    # Get current user if logged in
-    user = None
-    if 'user_id' in session:
-        from db_manager import DatabaseManager
-        db_manager = DatabaseManager()
-        try:
-            user = db_manager.get_user_by_id(session['user_id'])
-        finally:
-            db_manager.close()
-    
-    return render_template('login.html', user=user)
+    return render_template('login.html', user=get_current_user())
 
 # User registration route
-@app.route('/register', methods=['GET', 'POST'])
+@main.route('/register', methods=['GET', 'POST'])
 def register():
     # If user is already logged in, redirect to home
     if 'user_id' in session:
@@ -248,80 +191,109 @@ def register():
         name = request.form['name']
         email = request.form['email']
         
+        # Stash the raw upload outside static/ before touching the database;
+        # a background job resizes it and attaches it to the account
+        incoming_path = None
+        file = request.files.get('profile_image')
+        if file and file.filename and allowed_file(file.filename):
+            ext = file.filename.rsplit('.', 1)[1].lower()
+            incoming_path = os.path.join(current_app.config['UPLOAD_INCOMING_FOLDER'], f"{uuid.uuid4().hex}.{ext}")
+            file.save(incoming_path)
+        
         # Check if email already exists
-        from db_manager import DatabaseManager
-        db_manager = DatabaseManager()
+        db_manager = get_db_manager()
         try:
             existing_user = db_manager.get_user_by_email(email)
             if existing_user:
+                _discard(incoming_path)
                 flash('Email already registered. Please log in.', 'error')
                 return redirect('/login')
             
-            # Handle profile image upload
-            profile_image_path = None
-            if 'profile_image' in request.files:
-                file = request.files['profile_image']
-                if file and file.filename and file.filename != '' and allowed_file(file.filename):
-                    # Create a secure filename
-                    filename = secure_filename(file.filename)
-                    # Add user identifier to filename to avoid conflicts
-                    name_part, ext = os.path.splitext(filename)
-                    unique_filename = f"{name_part}_{int(time.time())}{ext}"
-                    file_path = os.path.join(app.config['UPLOAD_FOLDER'], unique_filename)
-                    file.save(file_path)
-                    # Store relative path for web access
-                    profile_image_path = f"uploads/{unique_filename}"
-            
-            # Create new user
-            user = db_manager.create_user(name, email, profile_image_path)
+            # Create new user; the profile image is set once it is processed
+            user = db_manager.create_user(name, email)
+            if incoming_path:
+                jobs.enqueue('profile_image', user_id=user.id, path=incoming_path,
+                             upload_folder=os.path.abspath(current_app.config['UPLOAD_FOLDER']))
             # Store user ID in session
             session['user_id'] = user.id
             flash(f"Welcome {name}! Your account has been created successfully.", 'success')
             return redirect('/')
         except Exception as e:
+            _discard(incoming_path)
             flash(f"Error creating account: {str(e)}", 'error')
             return redirect('/register')
-        finally:
-            db_manager.close()
-    
-    # Get current user if logged in
-    user = None
-    if 'user_id' in session:
-        from db_manager import DatabaseManager
-        db_manager = DatabaseManager()
-        try:
-            user = db_manager.get_user_by_id(session['user_id'])
-        finally:
-            db_manager.close()
     
-    return render_template('register.html', user=user)
+    return render_template('register.html', user=get_current_user())
 
 # User profile route
-@app.route('/profile')
+@main.route('/profile')
 def profile():
     if 'user_id' not in session:
-        flash('Please log in to view your profile.', 'error')
-        return redirect('/login')
+        return login_redirect()
     
-    from db_manager import DatabaseManager
-    db_manager = DatabaseManager()
-    try:
-        user = db_manager.get_user_by_id(session['user_id'])
-        if not user:
-            session.pop('user_id', None)
-            flash('User not found. Please log in again.', 'error')
-            return redirect('/login')
-        
-        return render_template('profile.html', user=user)
-    finally:
-        db_manager.close()
+    user = get_current_user()
+    if not user:
+        return login_redirect()
+    
+    return profile_page(user, rental.get_rental_summary(user.id))
 
 # User logout route
-@app.route('/logout')
+@main.route('/logout')
 def logout():
     session.pop('user_id', None)
     flash('You have been logged out.', 'info')
     return redirect('/')
 
+def create_app(test_config=None):
+    """Create and configure the Flask application.
+    
+    Nothing here connects to the database; the engine is created lazily on
+    the first request and the schema is bootstrapped with `flask init-db`.
+    """
+    app = Flask(__name__, template_folder='.')
+    app.secret_key = 'dev-secret-change-me'
+    
+    # Per-request SQL/latency instrumentation is opt-in
+    app.config['METRICS_ENABLED'] = os.getenv('ENABLE_METRICS') == '1'
+    
+    # Bearer token for /api/v1/export; the endpoint is disabled without one
+    app.config['EXPORT_API_TOKEN'] = os.getenv('EXPORT_API_TOKEN')
+    
+    # Configuration for file uploads
+    app.config['UPLOAD_FOLDER'] = os.path.join('static', 'uploads')
+    app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max file size
+    # Raw uploads wait here, outside static/, until their job has processed them
+    app.config['UPLOAD_INCOMING_FOLDER'] = os.path.join(app.instance_path, 'incoming')
+    
+    if test_config is not None:
+        app.config.update(test_config)
+    
+    # Ensure upload folder exists
+    os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
+    os.makedirs(app.config['UPLOAD_INCOMING_FOLDER'], exist_ok=True)
+    
+    app.after_request(remember_primary)
+    app.teardown_appcontext(close_db_manager)
+    app.cli.add_command(init_db_command)
+    app.cli.add_command(batch_command)
+    app.cli.add_command(archive_command)
+    app.cli.add_command(rebuild_summaries_command)
+    app.cli.add_command(export_command)
+    app.cli.add_command(import_command)
+    app.cli.add_command(purge_command)
+    app.cli.add_command(images_command)
+    app.cli.add_command(jobs_command)
+    app.cli.add_command(assets_command)
+    app.cli.add_command(car_images_command)
+    app.add_template_global(image_variant)
+    app.register_blueprint(main)
+    app.register_blueprint(api)
+    assets.init_app(app)
+    fragments.init_app(app)
+    metrics.init_app(app)
+    return app
+
+app = create_app()
+
 if __name__ == '__main__':
     app.run(debug=True)
\ No newline at end of file
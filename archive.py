@@ -0,0 +1,153 @@
+"""
+Archival and partitioning of rental history.
+
+Closed loans are moved from borrowed_cars to borrowed_cars_archive so the
+table the borrow/return paths scan only holds open loans. On Postgres,
+returned_cars can also be converted to a table partitioned by month on
+returned_at; reads that stay inside the recent history window (see
+db_manager.RECENT_HISTORY_MONTHS) then only touch the newest partitions.
+"""
+
+from datetime import datetime
+from sqlalchemy import text
+from db_manager import get_engine, create_missing_indexes
+
+# Months of partitions created ahead of the current one
+MONTHS_AHEAD = 3
+
+def _month_start(year, month):
+    """First day of the given month, normalizing month overflow"""
+    months = year * 12 + (month - 1)
+    return datetime(months // 12, months % 12 + 1, 1)
+
+def partition_name(month_start):
+    return f"returned_cars_y{month_start.year:04d}m{month_start.month:02d}"
+
+def is_partitioned(conn):
+    return conn.execute(text(
+        "SELECT 1 FROM pg_partitioned_table p JOIN pg_class c ON c.oid = p.partrelid "
+        "WHERE c.relname = 'returned_cars'"
+    )).first() is not None
+
+def _default_partition_attached(conn):
+    return conn.execute(text(
+        "SELECT 1 FROM pg_partitioned_table p JOIN pg_class c ON c.oid = p.partrelid "
+        "JOIN pg_class d ON d.oid = p.partdefid "
+        "WHERE c.relname = 'returned_cars' AND d.relname = 'returned_cars_default'"
+    )).first() is not None
+
+def _create_partition(conn, month, following):
+    """Create one monthly partition, moving matching rows out of the default.
+    
+    Postgres refuses to add a partition while the default partition holds
+    rows in its range (e.g. after ensure_returned_cars_partitions was not
+    run for months), so the default is detached, the rows are moved into
+    the new partition and the default is attached again.
+    """
+    name = partition_name(month)
+    bounds = f"FOR VALUES FROM ('{month:%Y-%m-%d}') TO ('{following:%Y-%m-%d}')"
+    in_range = f"returned_at >= '{month:%Y-%m-%d}' AND returned_at < '{following:%Y-%m-%d}'"
+    stranded = _default_partition_attached(conn) and conn.execute(text(
+        f"SELECT 1 FROM returned_cars_default WHERE {in_range} LIMIT 1"
+    )).first() is not None
+    if not stranded:
+        conn.execute(text(f"CREATE TABLE {name} PARTITION OF returned_cars {bounds}"))
+        return
+    conn.execute(text("ALTER TABLE returned_cars DETACH PARTITION returned_cars_default"))
+    conn.execute(text(f"CREATE TABLE {name} PARTITION OF returned_cars {bounds}"))
+    conn.execute(text(f"""
+        INSERT INTO {name} (id, borrower_id, car_id, borrowed_at, returned_at)
+        SELECT id, borrower_id, car_id, borrowed_at, returned_at
+        FROM returned_cars_default WHERE {in_range}
+    """))
+    conn.execute(text(f"DELETE FROM returned_cars_default WHERE {in_range}"))
+    conn.execute(text("ALTER TABLE returned_cars ATTACH PARTITION returned_cars_default DEFAULT"))
+
+def _create_partitions(conn, first, last):
+    """Create the missing monthly partitions covering first..last (both month starts)"""
+    created = []
+    month = first
+    while month <= last:
+        following = _month_start(month.year, month.month + 1)
+        name = partition_name(month)
+        if conn.execute(text("SELECT to_regclass(:name)"), {'name': name}).scalar() is None:
+            _create_partition(conn, month, following)
+        created.append(name)
+        month = following
+    return created
+
+def ensure_returned_cars_partitions(months_ahead=MONTHS_AHEAD):
+    """Create this month's and the next months_ahead partitions if missing.
+    
+    Run this regularly (e.g. from cron); rows outside every monthly
+    partition land in returned_cars_default. Months that piled up there
+    since the oldest such row (a missed run) get their partitions too, with
+    the rows moved in. Returns the partition names.
+    """
+    engine = get_engine()
+    if engine.dialect.name != 'postgresql':
+        return []
+    now = datetime.now()
+    with engine.begin() as conn:
+        if not is_partitioned(conn):
+            return []
+        first = _month_start(now.year, now.month)
+        if _default_partition_attached(conn):
+            oldest = conn.execute(text("SELECT min(returned_at) FROM returned_cars_default")).scalar()
+            if oldest is not None:
+                first = min(first, _month_start(oldest.year, oldest.month))
+        return _create_partitions(conn, first, _month_start(now.year, now.month + months_ahead))
+
+def partition_returned_cars(months_ahead=MONTHS_AHEAD):
+    """Convert returned_cars into a table range-partitioned by month.
+    
+    Copies the existing rows in a single transaction, so schedule it for a
+    quiet period. Returns the partitions created, or an empty list if the
+    database is not Postgres or the table is already partitioned.
+    """
+    engine = get_engine()
+    if engine.dialect.name != 'postgresql':
+        return []
+    with engine.begin() as conn:
+        if is_partitioned(conn):
+            return []
+        conn.execute(text("LOCK TABLE returned_cars IN ACCESS EXCLUSIVE MODE"))
+        conn.execute(text("ALTER TABLE returned_cars RENAME TO returned_cars_unpartitioned"))
+        conn.execute(text(
+            "ALTER TABLE returned_cars_unpartitioned "
+            "RENAME CONSTRAINT returned_cars_pkey TO returned_cars_unpartitioned_pkey"
+        ))
+        for index_name in ('ix_returned_cars_borrower_id', 'ix_returned_cars_returned_at_id'):
+            conn.execute(text(f"DROP INDEX IF EXISTS {index_name}"))
+        # The partition key must be part of the primary key and never NULL
+        conn.execute(text("""
+            CREATE TABLE returned_cars (
+                id INTEGER NOT NULL DEFAULT nextval('returned_cars_id_seq'),
+                borrower_id INTEGER REFERENCES borrowers(id),
+                car_id INTEGER REFERENCES cars(id),
+                borrowed_at TIMESTAMP,
+                returned_at TIMESTAMP NOT NULL DEFAULT now(),
+                PRIMARY KEY (id, returned_at)
+            ) PARTITION BY RANGE (returned_at)
+        """))
+        conn.execute(text("CREATE TABLE returned_cars_default PARTITION OF returned_cars DEFAULT"))
+
+        now = datetime.now()
+        oldest = conn.execute(text(
+            "SELECT min(COALESCE(returned_at, borrowed_at)) FROM returned_cars_unpartitioned"
+        )).scalar() or now
+        created = _create_partitions(
+            conn,
+            _month_start(oldest.year, oldest.month),
+            _month_start(now.year, now.month + months_ahead),
+        )
+
+        conn.execute(text("""
+            INSERT INTO returned_cars (id, borrower_id, car_id, borrowed_at, returned_at)
+            SELECT id, borrower_id, car_id, borrowed_at, COALESCE(returned_at, borrowed_at, now())
+            FROM returned_cars_unpartitioned
+        """))
+        conn.execute(text("ALTER SEQUENCE returned_cars_id_seq OWNED BY returned_cars.id"))
+        conn.execute(text("DROP TABLE returned_cars_unpartitioned"))
+    create_missing_indexes()
+    return created
@@ -0,0 +1,299 @@
+"""
+ASGI entry point serving the car rental app with an async database layer.
+
+    uvicorn asgi:app --workers 4
+
+The read-heavy pages (GET /, /list, /borrow, /return, /track, /profile,
+/api/v1/cars and /api/v1/history) run on the event loop and query through
+AsyncDatabaseManager, so waiting on the database or on a slow client ties
+up no thread. Every other request (form posts, login, uploads, exports) is
+handed to the Flask WSGI app in a worker thread. Both paths render with
+the Flask app's templates, hooks and session, and build their pages with
+the same page builders as the WSGI views (home_page, track_page,
+history_response, ...), so pages are byte-for-byte the same as under a
+WSGI server.
+"""
+
+import asyncio
+import io
+import sys
+import time
+from contextlib import asynccontextmanager
+from flask import jsonify, request, session
+from werkzeug.exceptions import HTTPException
+from app import (app as flask_app, home_page, list_page, borrow_page, return_page, track_page, profile_page,
+                 login_redirect)
+from Car import CarCard
+from api import history_response
+from async_db_manager import AsyncDatabaseManager, dispose_async_engines, get_async_engine
+from extensions import get_history_args, rental
+
+# Responses up to this size are buffered and sent from the event loop;
+# larger (streamed) ones are written from their worker thread as produced
+WSGI_BUFFER_BYTES = 256 * 1024
+
+_async_views = {}
+
+def async_view(endpoint):
+    """Serve GET requests for a Flask endpoint with this coroutine instead"""
+    def register(view):
+        _async_views[endpoint] = view
+        return view
+    return register
+
+@asynccontextmanager
+async def _db():
+    """An AsyncDatabaseManager for this request, honouring read-your-writes"""
+    db_manager = AsyncDatabaseManager(use_primary=session.get('primary_until', 0) > time.time())
+    try:
+        yield db_manager
+    finally:
+        await db_manager.close()
+
+async def _current_user(db_manager):
+    if 'user_id' not in session:
+        return None
+    return await db_manager.get_user_by_id(session['user_id'])
+
+async def _available_car_cards():
+    """Available cars from the shared fleet snapshot (see RentalCars)"""
+    if not rental.is_seeded:
+        # First use seeds the catalog through the sync path, once per process
+        return await asyncio.to_thread(rental.get_available_car_cards)
+    cars = rental.cached_available_car_cards()
+    if cars is None:
+        # Reload from the primary: a lagging replica would cache stale
+        # availability under the current version
+        db_manager = AsyncDatabaseManager(use_primary=True)
+        try:
+            version = await db_manager.get_fleet_version()
+            cars = rental.cached_available_car_cards(version)
+            if cars is None:
+                cars = [CarCard(car.name, car.image) for car in await db_manager.get_available_cars()]
+                rental.store_available_car_cards(version, cars)
+        finally:
+            await db_manager.close()
+    return cars
+
+async def _available_car_names():
+    return [car.name for car in await _available_car_cards()]
+
+@async_view('main.home')
+async def home():
+    async with _db() as db_manager:
+        return home_page(await _available_car_cards(), await _current_user(db_manager))
+
+@async_view('main.list_cars')
+async def list_cars():
+    async with _db() as db_manager:
+        return list_page(await _available_car_cards(), await _current_user(db_manager))
+
+@async_view('main.borrow')
+async def borrow():
+    async with _db() as db_manager:
+        return borrow_page(await _available_car_names(), await _current_user(db_manager))
+
+@async_view('main.return_car')
+async def return_car():
+    user_id = session['user_id'] if 'user_id' in session else None
+    async with _db() as db_manager:
+        if user_id:
+            borrowed_records = await db_manager.get_borrowed_cars_by_user(user_id)
+        else:
+            borrowed_records = await db_manager.get_borrowed_cars()
+        return return_page(borrowed_records, await _current_user(db_manager))
+
+async def _history(db_manager, args):
+    """Borrowed, returned and donated records for HistoryArgs args (see get_history_args)"""
+    if args.user_id:
+        borrowed_records = await db_manager.get_borrowed_cars_by_user(args.user_id)
+        returned_records = await db_manager.get_returned_cars_by_user(args.user_id, args.limit,
+                                                                      args.returned_cursor, args.all_history)
+    else:
+        borrowed_records = await db_manager.get_borrowed_cars()
+        returned_records = await db_manager.get_returned_cars(args.limit, args.returned_cursor, args.all_history)
+    donated_records = await db_manager.get_donated_cars(args.limit, args.donated_cursor)
+    return borrowed_records, returned_records, donated_records
+
+@async_view('main.track_cars')
+async def track_cars():
+    args = get_history_args()
+    async with _db() as db_manager:
+        user = await _current_user(db_manager)
+        history = await _history(db_manager, args)
+        summary = await db_manager.get_rental_summary(args.user_id) if args.user_id else None
+        return track_page(args, user, summary, *history)
+
+@async_view('main.profile')
+async def profile():
+    if 'user_id' not in session:
+        return login_redirect()
+    async with _db() as db_manager:
+        user = await _current_user(db_manager)
+        if not user:
+            return login_redirect()
+        return profile_page(user, await db_manager.get_rental_summary(user.id))
+
+@async_view('api.available_cars')
+async def api_available_cars():
+    return jsonify(cars=await _available_car_names())
+
+@async_view('api.history')
+async def api_history():
+    args = get_history_args()
+    async with _db() as db_manager:
+        return history_response(args, *await _history(db_manager, args))
+
+def _environ(scope, body):
+    """Build a WSGI environ for an ASGI HTTP scope"""
+    server = scope.get('server') or ('localhost', 80)
+    client = scope.get('client') or ('', 0)
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': scope.get('root_path', '').encode('utf-8').decode('latin-1'),
+        'PATH_INFO': scope['path'].encode('utf-8').decode('latin-1'),
+        'QUERY_STRING': scope.get('query_string', b'').decode('latin-1'),
+        'SERVER_NAME': server[0],
+        'SERVER_PORT': str(server[1]),
+        'SERVER_PROTOCOL': f"HTTP/{scope.get('http_version', '1.1')}",
+        'REMOTE_ADDR': client[0],
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': io.BytesIO(body),
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': True,
+        'wsgi.run_once': False,
+    }
+    for name, value in scope.get('headers', []):
+        name = name.decode('latin-1').upper().replace('-', '_')
+        key = name if name in ('CONTENT_TYPE', 'CONTENT_LENGTH') else 'HTTP_' + name
+        value = value.decode('latin-1')
+        if key in environ:
+            environ[key] += ('; ' if key == 'HTTP_COOKIE' else ',') + value
+        else:
+            environ[key] = value
+    return environ
+
+def _start_message(status, headers):
+    return {
+        'type': 'http.response.start',
+        'status': status,
+        'headers': [(name.lower().encode('latin-1'), value.encode('latin-1')) for name, value in headers],
+    }
+
+async def _read_body(receive):
+    """Read the request body, or None if it exceeds MAX_CONTENT_LENGTH"""
+    limit = flask_app.config.get('MAX_CONTENT_LENGTH')
+    chunks, size = [], 0
+    while True:
+        message = await receive()
+        if message['type'] == 'http.disconnect':
+            return None
+        chunk = message.get('body', b'')
+        size += len(chunk)
+        if limit is not None and size > limit:
+            return None
+        chunks.append(chunk)
+        if not message.get('more_body'):
+            return b''.join(chunks)
+
+async def _serve_async(view, environ, send):
+    """Run an async view inside a Flask request context with the app's hooks"""
+    with flask_app.request_context(environ):
+        try:
+            try:
+                rv = flask_app.preprocess_request()
+                if rv is None:
+                    rv = await view(**request.view_args)
+            except Exception as e:
+                rv = flask_app.handle_user_exception(e)
+            response = flask_app.finalize_request(rv)
+        except Exception as e:
+            response = flask_app.make_response(flask_app.handle_exception(e))
+        body = response.get_data()
+        await send(_start_message(response.status_code, response.headers.to_wsgi_list()))
+    await send({'type': 'http.response.body', 'body': body})
+
+def _run_wsgi(environ, loop, send):
+    """Run the Flask WSGI app in a worker thread.
+
+    Returns (status, headers, body) for responses small enough to buffer;
+    bigger ones are sent from this thread and None is returned.
+    """
+    started = {}
+
+    def start_response(status, headers, exc_info=None):
+        started['status'] = int(status.split(' ', 1)[0])
+        started['headers'] = headers
+
+    def send_now(message):
+        asyncio.run_coroutine_threadsafe(send(message), loop).result()
+
+    body = flask_app(environ, start_response)
+    try:
+        chunks, size = [], 0
+        iterator = iter(body)
+        for chunk in iterator:
+            chunks.append(chunk)
+            size += len(chunk)
+            if size > WSGI_BUFFER_BYTES:
+                send_now(_start_message(started['status'], started['headers']))
+                for pending in chunks:
+                    send_now({'type': 'http.response.body', 'body': pending, 'more_body': True})
+                for chunk in iterator:
+                    if chunk:
+                        send_now({'type': 'http.response.body', 'body': chunk, 'more_body': True})
+                send_now({'type': 'http.response.body', 'body': b''})
+                return None
+        return started['status'], started['headers'], b''.join(chunks)
+    finally:
+        if hasattr(body, 'close'):
+            body.close()
+
+async def _serve_wsgi(environ, send):
+    result = await asyncio.to_thread(_run_wsgi, environ, asyncio.get_running_loop(), send)
+    if result is not None:
+        status, headers, body = result
+        await send(_start_message(status, headers))
+        await send({'type': 'http.response.body', 'body': body})
+
+async def _lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            # Connect (or fall back to SQLite) before taking traffic, off the loop
+            await asyncio.to_thread(get_async_engine)
+            await send({'type': 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+            await dispose_async_engines()
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
+
+async def app(scope, receive, send):
+    """The ASGI application"""
+    if scope['type'] == 'lifespan':
+        await _lifespan(receive, send)
+        return
+    if scope['type'] != 'http':
+        return
+
+    body = await _read_body(receive)
+    if body is None:
+        await send(_start_message(413, [('Content-Type', 'text/plain')]))
+        await send({'type': 'http.response.body', 'body': b'Request Entity Too Large'})
+        return
+    environ = _environ(scope, body)
+
+    view = None
+    if scope['method'] == 'GET':
+        try:
+            endpoint, _ = flask_app.url_map.bind_to_environ(environ).match()
+            view = _async_views.get(endpoint)
+        except HTTPException:
+            # 404s, redirects and the like are left to Flask
+            pass
+    if view is not None:
+        await _serve_async(view, environ, send)
+    else:
+        await _serve_wsgi(environ, send)
@@ -0,0 +1,153 @@
+"""
+Fingerprinted static asset URLs with long-lived caching.
+
+Templates call static_url('styles.css'), which returns
+/assets/<content hash>/styles.css. Because the URL changes whenever the
+file does, responses for it are sent with
+`Cache-Control: public, max-age=31536000, immutable` and the hash as
+ETag: browsers keep using their copy without revalidating it.
+
+Hashes are computed on first use and cached per process until the file's
+size or modification time changes. `flask --app app assets` hashes every
+file up front and writes gzip (and, with the brotli package installed,
+brotli) copies of text assets next to them; those are served to clients
+that accept them.
+"""
+
+import gzip
+import hashlib
+import mimetypes
+import os
+import threading
+from flask import abort, current_app, request, send_file, url_for
+from werkzeug.security import safe_join
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+ONE_YEAR = 365 * 24 * 60 * 60  # seconds
+# Hex digits of the SHA-256 content hash used in URLs
+DIGEST_LENGTH = 12
+# Assets worth compressing; images are compressed already
+COMPRESSIBLE_EXTENSIONS = ('.css', '.js', '.svg', '.json', '.txt')
+# Preferred first
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+# path -> (mtime_ns, size, digest)
+_fingerprints = {}
+_lock = threading.Lock()
+
+def fingerprint(static_folder, filename):
+    """Content hash of a file under static_folder, or None if there is no such file"""
+    path = safe_join(static_folder, filename)
+    if path is None:
+        return None
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    cached = _fingerprints.get(path)
+    if cached is not None and cached[:2] == (stat.st_mtime_ns, stat.st_size):
+        return cached[2]
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(block)
+    digest = digest.hexdigest()[:DIGEST_LENGTH]
+    with _lock:
+        _fingerprints[path] = (stat.st_mtime_ns, stat.st_size, digest)
+    return digest
+
+def static_url(filename):
+    """Template helper: the fingerprinted URL of a static file"""
+    digest = fingerprint(current_app.static_folder, filename)
+    if digest is None:
+        return url_for('static', filename=filename)
+    return url_for('asset', digest=digest, filename=filename)
+
+def _precompressed(path, accepted):
+    """(encoding, path) of the best up-to-date compressed copy the client accepts"""
+    if not path.endswith(COMPRESSIBLE_EXTENSIONS):
+        return None, path
+    mtime = os.path.getmtime(path)
+    for encoding, suffix in ENCODINGS:
+        candidate = path + suffix
+        if accepted[encoding] and os.path.isfile(candidate) and os.path.getmtime(candidate) >= mtime:
+            return encoding, candidate
+    return None, path
+
+def asset_view(digest, filename):
+    """Serve /assets/<digest>/<filename> with immutable caching"""
+    static_folder = current_app.static_folder
+    current = fingerprint(static_folder, filename)
+    if current is None:
+        abort(404)
+    path = safe_join(static_folder, filename)
+    if current != digest:
+        # A link from an older page: serve today's file, but only cache it
+        # briefly since it is not the version the URL names
+        return send_file(path, conditional=True)
+
+    encoding, send_path = _precompressed(path, request.accept_encodings)
+    response = send_file(
+        send_path,
+        mimetype=mimetypes.guess_type(filename)[0] or 'application/octet-stream',
+        etag=f"{digest}-{encoding}" if encoding else digest,
+        max_age=ONE_YEAR,
+        conditional=True,
+    )
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+    if path.endswith(COMPRESSIBLE_EXTENSIONS):
+        response.vary.add('Accept-Encoding')
+    response.cache_control.public = True
+    response.cache_control.immutable = True
+    return response
+
+def _write_if_smaller(target, data, original_size):
+    if len(data) >= original_size:
+        return False
+    tmp = target + '.tmp'
+    with open(tmp, 'wb') as f:
+        f.write(data)
+    os.replace(tmp, target)
+    return True
+
+def build(static_folder, force=False):
+    """Hash every static file and precompress text assets.
+
+    Compressed copies that are up to date are kept unless force is set.
+    Returns (files hashed, compressed copies written).
+    """
+    hashed = written = 0
+    for directory, _, names in os.walk(static_folder):
+        for name in names:
+            if name.endswith(('.gz', '.br', '.tmp')):
+                continue
+            path = os.path.join(directory, name)
+            fingerprint(static_folder, os.path.relpath(path, static_folder).replace(os.sep, '/'))
+            hashed += 1
+            if not name.endswith(COMPRESSIBLE_EXTENSIONS):
+                continue
+            with open(path, 'rb') as f:
+                data = f.read()
+            mtime = os.path.getmtime(path)
+            for encoding, suffix in ENCODINGS:
+                target = path + suffix
+                if not force and os.path.exists(target) and os.path.getmtime(target) >= mtime:
+                    continue
+                if encoding == 'br':
+                    if brotli is None:
+                        continue
+                    compressed = brotli.compress(data, quality=11)
+                else:
+                    compressed = gzip.compress(data, compresslevel=9, mtime=0)
+                written += _write_if_smaller(target, compressed, len(data))
+    return hashed, written
+
+def init_app(app):
+    """Add the /assets route and the static_url() template helper"""
+    app.add_url_rule('/assets/<digest>/<path:filename>', 'asset', asset_view)
+    app.add_template_global(static_url)
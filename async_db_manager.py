@@ -0,0 +1,122 @@
+"""
+Async variant of DatabaseManager, used by the ASGI entry point (asgi.py).
+
+Runs the same read statements as DatabaseManager through SQLAlchemy's
+asyncio extension: asyncpg for PostgreSQL, aiosqlite for the SQLite
+fallback. Install them with `pip install "sqlalchemy[asyncio]" asyncpg aiosqlite`.
+Writes are not implemented here; they keep going through DatabaseManager.
+"""
+
+import threading
+from sqlalchemy import select
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+import db_manager as db
+import slow_query_log
+from db_manager import (borrowed_cars_statement, returned_cars_statement, donated_cars_statement,
+                        available_cars_statement, fleet_version_statement, empty_rental_summary)
+from models import User, UserRentalSummary
+
+# asyncio driver for each database backend
+ASYNC_DRIVERS = {
+    'postgresql': 'postgresql+asyncpg',
+    'sqlite': 'sqlite+aiosqlite',
+}
+
+_async_engine = None
+_async_replica_engine = None
+_async_engine_lock = threading.Lock()
+
+def async_url(url):
+    """The same database URL, using the backend's asyncio driver"""
+    url = make_url(url)
+    return url.set(drivername=ASYNC_DRIVERS[url.get_backend_name()])
+
+def _create_async_engine(url):
+    engine = create_async_engine(async_url(url), **db.pool_options())
+    if db.SLOW_QUERY_MS > 0:
+        slow_query_log.install(engine.sync_engine, db.SLOW_QUERY_MS)
+    return engine
+
+def get_async_engine():
+    """Get the shared async engine, creating it on first use.
+
+    Points at whichever database the sync engine settled on, so the SQLite
+    fallback applies here too. Creating the sync engine connects once, so
+    call this from a thread (or at startup) rather than on the event loop.
+    """
+    global _async_engine
+    if _async_engine is None:
+        with _async_engine_lock:
+            if _async_engine is None:
+                _async_engine = _create_async_engine(db.get_engine().url)
+    return _async_engine
+
+def get_async_replica_engine():
+    """Get the async read replica engine, or None when no replica is in use"""
+    global _async_replica_engine
+    if db.get_replica_engine() is None:
+        return None
+    if _async_replica_engine is None:
+        with _async_engine_lock:
+            if _async_replica_engine is None:
+                _async_replica_engine = _create_async_engine(db.REPLICA_URL)
+    return _async_replica_engine
+
+async def dispose_async_engines():
+    """Close all pooled async connections (on shutdown)"""
+    global _async_engine, _async_replica_engine
+    for engine in (_async_engine, _async_replica_engine):
+        if engine is not None:
+            await engine.dispose()
+    _async_engine = _async_replica_engine = None
+
+class AsyncDatabaseManager:
+    """Read-only async counterpart of DatabaseManager.
+
+    Reads go to the replica when one is configured, unless use_primary is
+    set (e.g. right after the client wrote). Call close() when done.
+    """
+    def __init__(self, use_primary=False):
+        engine = None if use_primary else get_async_replica_engine()
+        self.session = AsyncSession(bind=engine or get_async_engine(), expire_on_commit=False)
+
+    async def get_fleet_version(self):
+        """Get the fleet availability version (0 before the first change)"""
+        return (await self.session.execute(fleet_version_statement())).scalar() or 0
+
+    async def get_available_cars(self):
+        """Get all available cars"""
+        return (await self.session.scalars(available_cars_statement())).all()
+
+    async def get_borrowed_cars(self):
+        """Get all currently borrowed cars with eager loading of relationships"""
+        return (await self.session.scalars(borrowed_cars_statement())).all()
+
+    async def get_borrowed_cars_by_user(self, user_id):
+        """Get borrowed cars for a specific user"""
+        return (await self.session.scalars(borrowed_cars_statement(user_id))).all()
+
+    async def get_returned_cars(self, limit=None, cursor=None, all_history=False):
+        """Get returned cars, newest first (see DatabaseManager.get_returned_cars)"""
+        return (await self.session.scalars(returned_cars_statement(None, limit, cursor, all_history))).all()
+
+    async def get_returned_cars_by_user(self, user_id, limit=None, cursor=None, all_history=False):
+        """Get returned cars for a specific user, newest first"""
+        return (await self.session.scalars(returned_cars_statement(user_id, limit, cursor, all_history))).all()
+
+    async def get_donated_cars(self, limit=None, cursor=None):
+        """Get donated cars, newest first"""
+        return (await self.session.scalars(donated_cars_statement(limit, cursor))).all()
+
+    async def get_user_by_id(self, user_id):
+        """Get user by ID"""
+        return (await self.session.scalars(select(User).where(User.id == user_id))).first()
+
+    async def get_rental_summary(self, user_id):
+        """Get a user's rental totals with a single primary-key lookup"""
+        return await self.session.get(UserRentalSummary, user_id) or empty_rental_summary(user_id)
+
+    async def close(self):
+        """Close the database session"""
+        await self.session.close()
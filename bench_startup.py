@@ -0,0 +1,36 @@
+#!/usr/bin/env python3
+"""
+Benchmark application startup time (`import app` in a fresh interpreter)
+"""
+
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+# Startup budget in milliseconds for the median cold import
+STARTUP_BUDGET_MS = float(os.getenv('STARTUP_BUDGET_MS', '1000'))
+
+def measure_import(module='app', runs=5):
+    """Return wall-clock milliseconds of `import <module>` for each run"""
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, '-c', f'import {module}'], check=True,
+                       cwd=os.path.dirname(os.path.abspath(__file__)))
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+def bench_startup():
+    timings = measure_import()
+    median = statistics.median(timings)
+    print(f"import app: median {median:.1f} ms, min {min(timings):.1f} ms, max {max(timings):.1f} ms")
+    print(f"Budget: {STARTUP_BUDGET_MS:.0f} ms")
+    if median > STARTUP_BUDGET_MS:
+        print("Startup budget exceeded!")
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(bench_startup())
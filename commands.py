@@ -0,0 +1,239 @@
+"""
+Flask CLI commands (run with `flask --app app <command>`)
+
+Every command runs inside the app context (@with_appcontext), so current_app
+and the g-scoped database session behind `rental` are available.
+"""
+
+import csv
+import os
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+from db_manager import (DatabaseManager, get_engine, init_db, create_missing_columns, create_missing_indexes,
+                        fill_missing_timestamps)
+from extensions import INITIAL_CARS, rental
+import archive
+import assets
+import export
+import images
+import importer
+import jobs
+import maintenance
+
+@click.command('init-db')
+@with_appcontext
+def init_db_command():
+    """Create tables, add missing indexes and seed the car catalog."""
+    init_db()
+    columns = create_missing_columns()
+    created = create_missing_indexes()
+    filled = fill_missing_timestamps()
+    db_manager = DatabaseManager()
+    try:
+        inserted = db_manager.ensure_cars(INITIAL_CARS)
+    finally:
+        db_manager.close()
+    click.echo(f"Initialized the database ({len(columns)} column(s) and {len(created)} index(es) added, "
+               f"{filled} missing timestamp(s) filled, {inserted} car(s) seeded).")
+
+@click.command('batch')
+@click.argument('action', type=click.Choice(['borrow', 'return']))
+@click.argument('csv_file', type=click.File('r', encoding='utf-8'))
+@with_appcontext
+def batch_command(action, csv_file):
+    """Borrow or return many cars in one transaction.
+    
+    CSV_FILE needs borrower_name and car_name columns.
+    """
+    reader = csv.DictReader(csv_file)
+    if not {'borrower_name', 'car_name'} <= set(reader.fieldnames or []):
+        raise click.UsageError("CSV file needs 'borrower_name' and 'car_name' columns")
+    pairs = [(row['borrower_name'].strip(), row['car_name'].strip()) for row in reader]
+    if action == 'borrow':
+        results = rental.borrowCarsBatch(pairs)
+    else:
+        results = rental.returnCarsBatch(pairs)
+    for result in results:
+        status = 'ok' if result['success'] else 'FAILED'
+        click.echo(f"  - {result['car_name']} ({result['borrower_name']}): {status}")
+    succeeded = sum(1 for result in results if result['success'])
+    click.echo(f"{succeeded} of {len(results)} car(s) {action}ed.")
+
+@click.command('rebuild-summaries')
+@with_appcontext
+def rebuild_summaries_command():
+    """Recompute per-user rental summaries from the rental history."""
+    db_manager = DatabaseManager()
+    try:
+        users = db_manager.rebuild_rental_summaries()
+    finally:
+        db_manager.close()
+    click.echo(f"Rebuilt rental summaries for {users} user(s).")
+
+def _parse_date_option(ctx, param, value):
+    try:
+        return export.parse_date(value)
+    except ValueError:
+        raise click.BadParameter('expected an ISO 8601 date, e.g. 2025-01-31')
+
+@click.command('export')
+@click.argument('table', type=click.Choice(export.TABLES))
+@click.option('--format', 'fmt', type=click.Choice(list(export.FORMATS)), default='csv', show_default=True)
+@click.option('--since', callback=_parse_date_option, help='Only rows on or after this date.')
+@click.option('--until', callback=_parse_date_option, help='Only rows before this date.')
+@click.option('--output', type=click.File('w', encoding='utf-8'), default='-', help='File to write (default: stdout).')
+@with_appcontext
+def export_command(table, fmt, since, until, output):
+    """Stream returned, borrowed or donated car history as CSV or NDJSON."""
+    for chunk in export.export_history(table, fmt, since, until):
+        output.write(chunk)
+
+@click.command('import')
+@click.argument('kind', type=click.Choice(importer.KINDS))
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--format', 'fmt', type=click.Choice(importer.FORMATS),
+              help='Input format (default: from the file extension).')
+@click.option('--chunk-size', default=importer.CHUNK_SIZE, show_default=True, help='Records per transaction.')
+@click.option('--restart', is_flag=True, help='Ignore saved progress and import the whole file again.')
+@with_appcontext
+def import_command(kind, path, fmt, chunk_size, restart):
+    """Bulk-load cars, borrowers or rentals from a CSV or NDJSON file.
+    
+    Interrupted imports resume after the last committed chunk when re-run.
+    """
+    try:
+        imported, skipped = importer.import_records(
+            kind, importer.read_records(path, fmt), importer.source_key(kind, path), chunk_size, restart,
+            progress=lambda done: click.echo(f"  {done} record(s) committed", err=True),
+        )
+    except ValueError as e:
+        raise click.ClickException(str(e))
+    if skipped:
+        click.echo(f"Skipped {skipped} record(s) imported by an earlier run.")
+    click.echo(f"Imported {imported} {kind} record(s).")
+
+@click.command('purge')
+@click.option('--borrower', 'borrowers', multiple=True, help='Borrower name to purge (repeatable).')
+@click.option('--user', 'user_id', type=int, help='User id to delete with all of their data.')
+@click.option('--older-than', callback=_parse_date_option, help='Purge closed history before this date.')
+@click.option('--batch-size', default=maintenance.BATCH_SIZE, show_default=True, help='Rows deleted per transaction.')
+@click.option('--dry-run', is_flag=True, help='Only count the rows that would be deleted.')
+@with_appcontext
+def purge_command(borrowers, user_id, older_than, batch_size, dry_run):
+    """Delete borrowers, a user or old history in bounded batches."""
+    if sum(bool(option) for option in (borrowers, user_id is not None, older_than)) != 1:
+        raise click.UsageError("Give exactly one of --borrower, --user or --older-than")
+    if borrowers:
+        counts = maintenance.purge_borrowers(borrowers, batch_size, dry_run)
+    elif user_id is not None:
+        counts = maintenance.purge_user(user_id, batch_size, dry_run)
+    else:
+        counts = maintenance.purge_older_than(older_than, batch_size, dry_run)
+    verb = 'Would delete' if dry_run else 'Deleted'
+    for table, count in counts.items():
+        click.echo(f"  - {table}: {count}")
+    click.echo(f"{verb} {sum(counts.values())} row(s).")
+
+@click.command('archive')
+@click.option('--batch-size', default=1000, show_default=True, help='Closed loans moved per transaction.')
+@click.option('--partition', is_flag=True, help='Also partition returned_cars by month (Postgres only).')
+@with_appcontext
+def archive_command(batch_size, partition):
+    """Archive closed loans and maintain returned_cars partitions."""
+    db_manager = DatabaseManager()
+    try:
+        moved = db_manager.archive_closed_loans(batch_size)
+    finally:
+        db_manager.close()
+    click.echo(f"Archived {moved} closed loan(s).")
+    if get_engine().dialect.name != 'postgresql':
+        if partition:
+            click.echo("Skipping returned_cars partitioning (Postgres only).")
+        return
+    if partition:
+        created = archive.partition_returned_cars()
+        if created:
+            click.echo(f"Partitioned returned_cars into {len(created)} monthly partition(s).")
+    created = archive.ensure_returned_cars_partitions()
+    if created:
+        click.echo(f"Ensured returned_cars partitions up to {created[-1]}.")
+
+@click.command('images')
+@click.option('--force', is_flag=True, help='Regenerate variants that are already up to date.')
+@with_appcontext
+def images_command(force):
+    """Generate resized WebP/JPEG variants of car photos and profile uploads."""
+    if not images.PILLOW_AVAILABLE:
+        raise click.ClickException("Pillow is not installed; run `pip install Pillow`")
+    static_folder = current_app.static_folder
+    sources = (images.source_images(os.path.join(static_folder, 'cars'))
+               + images.source_images(os.path.join(static_folder, 'uploads')))
+    written = failed = 0
+    for source in sources:
+        try:
+            written += len(images.generate_variants(source, force))
+        except ValueError as e:
+            failed += 1
+            click.echo(f"  - skipped {e}", err=True)
+    click.echo(f"Wrote {written} variant(s) for {len(sources) - failed} image(s).")
+
+@click.command('jobs')
+@click.option('--limit', type=int, help='Run at most this many jobs.')
+@with_appcontext
+def jobs_command(limit):
+    """Run pending background jobs, including ones left over after a crash."""
+    succeeded, failed = jobs.run_pending(limit)
+    click.echo(f"Ran {succeeded + failed} job(s): {succeeded} succeeded, {failed} failed.")
+
+@click.command('assets')
+@click.option('--force', is_flag=True, help='Recompress files whose compressed copies are up to date.')
+@with_appcontext
+def assets_command(force):
+    """Fingerprint static files and write gzip/brotli copies of text assets."""
+    hashed, written = assets.build(current_app.static_folder, force)
+    if assets.brotli is None:
+        click.echo("brotli is not installed; only gzip copies were written (`pip install brotli`).", err=True)
+    click.echo(f"Fingerprinted {hashed} file(s), wrote {written} compressed copy(ies).")
+
+@click.command('car-images')
+@click.option('--set', 'assignments', multiple=True, metavar='NAME=SOURCE',
+              help='Import an image (URL or file) for a car (repeatable).')
+@with_appcontext
+def car_images_command(assignments):
+    """Self-host car images in static/cars and record them in the cars table.
+    
+    Without --set, every car whose image is still a remote URL is downloaded
+    once and pointed at the local copy.
+    """
+    directory = os.path.join(current_app.static_folder, 'cars')
+    pending = []
+    for assignment in assignments:
+        name, sep, source = assignment.partition('=')
+        if not sep or not name.strip() or not source.strip():
+            raise click.BadParameter(f"expected NAME=SOURCE, got {assignment!r}", param_hint='--set')
+        pending.append((name.strip(), source.strip()))
+    db_manager = DatabaseManager()
+    try:
+        if not assignments:
+            pending = [(car.name, car.image) for car in db_manager.get_cars_with_remote_images()]
+        stored = 0
+        for name, source in pending:
+            try:
+                filename = images.import_image(source, directory, name)
+            except (ValueError, OSError) as e:
+                click.echo(f"  - {name}: skipped ({e})", err=True)
+                continue
+            if not db_manager.set_car_image(name, f"cars/{filename}"):
+                click.echo(f"  - {name}: no such car", err=True)
+                continue
+            if images.PILLOW_AVAILABLE:
+                try:
+                    images.generate_variants(os.path.join(directory, filename))
+                except ValueError as e:
+                    click.echo(f"  - {name}: no variants ({e})", err=True)
+            click.echo(f"  - {name}: cars/{filename}")
+            stored += 1
+    finally:
+        db_manager.close()
+    click.echo(f"Stored {stored} of {len(pending)} car image(s) in static/cars.")
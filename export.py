@@ -0,0 +1,62 @@
+"""
+Streaming CSV/NDJSON export of the rental history tables.
+
+Used by `flask --app app export` and GET /api/v1/export/<table>. Rows are
+read with a server-side cursor and written out one chunk at a time, so
+exporting millions of rows needs no more memory than exporting ten.
+"""
+
+import csv
+import io
+import json
+from datetime import date, datetime
+from db_manager import DatabaseManager
+
+TABLES = ('returned', 'borrowed', 'donated')
+FORMATS = {
+    'csv': 'text/csv',
+    'ndjson': 'application/x-ndjson',
+}
+# Rows fetched from the database per round trip
+CHUNK_SIZE = 1000
+
+def parse_date(value):
+    """Parse an ISO 8601 date or datetime, returning None for empty values"""
+    if not value:
+        return None
+    return datetime.fromisoformat(value)
+
+def _json_default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+def _csv_value(value):
+    return value.isoformat() if isinstance(value, (datetime, date)) else value
+
+def export_history(table, fmt='csv', since=None, until=None, chunk_size=CHUNK_SIZE):
+    """Yield a history table as CSV or NDJSON text, one chunk per string.
+    
+    Uses its own database session, which is closed once the export has
+    been consumed (or abandoned), so it is safe to stream from a response.
+    """
+    if table not in TABLES:
+        raise ValueError(f"table must be one of {', '.join(TABLES)}")
+    if fmt not in FORMATS:
+        raise ValueError(f"format must be one of {', '.join(FORMATS)}")
+    db_manager = DatabaseManager()
+    try:
+        columns, chunks = db_manager.stream_history(table, since, until, chunk_size)
+        if fmt == 'csv':
+            yield ','.join(columns) + '\r\n'
+        for rows in chunks:
+            buffer = io.StringIO()
+            if fmt == 'csv':
+                csv.writer(buffer).writerows([_csv_value(value) for value in row] for row in rows)
+            else:
+                for row in rows:
+                    buffer.write(json.dumps(dict(zip(columns, row)), default=_json_default))
+                    buffer.write('\n')
+            yield buffer.getvalue()
+    finally:
+        db_manager.close()
@@ -0,0 +1,93 @@
+"""
+Objects shared by the HTML views and the JSON API
+"""
+
+import os
+import time
+from collections import namedtuple
+from flask import abort, g, has_request_context, request, session
+from Car import RentalCars
+import db_manager as db
+from db_manager import DatabaseManager, decode_cursor
+
+# Rows per page for returned/donated history
+TRACK_PAGE_SIZE = 50
+TRACK_MAX_PAGE_SIZE = 200
+
+# Seconds a client keeps reading from the primary after writing, so it sees
+# its own borrow/return despite replica lag (only used with a read replica)
+REPLICA_STICKY_SECONDS = float(os.getenv('REPLICA_STICKY_SECONDS', '10'))
+
+# Cars every new database is seeded with, and their images
+INITIAL_CARS = {
+    "ORACLE REDBULL RB20": "cars/ORACLE REDBULL RB20.jpg",
+    "AMG GLS": "cars/AMG GLS.jpeg",
+    "FERRARI 296 GTB": "cars/FERRARI 296 GTB.jpg",
+    "APX GP": "cars/apx gp.jpg",
+    "MCLAREN 720S": "cars/MCLAREN 720S.jpeg",
+    "LAMBORGHINI HURACÁN": "cars/LAMBORGHINI HURACÁN.jpeg",
+    "BUGATTI CHIRON": "cars/BUGATTI CHIRON.jpeg",
+    # Remote until `flask --app app car-images` downloads it into static/cars
+    "ASTON MARTIN VANTAGE": "https://upload.wikimedia.org/wikipedia/commons/thumb/5/5a/2019_Aston_Martin_Vantage_V8_Automatic_4.0_Front.jpg/640px-2019_Aston_Martin_Vantage_V8_Automatic_4.0_Front.jpg",
+    "PORSCHE 911": "cars/PORSCHE 911.jpeg",
+    "BMW M3": "cars/BMW M3.jpeg",
+    "AUDI R8": "cars/AUDI R8.jpeg",
+}
+
+def get_db_manager():
+    """Get the database manager bound to the current app context (one session per request)"""
+    if 'db_manager' not in g:
+        g.db_manager = DatabaseManager()
+        if has_request_context() and session.get('primary_until', 0) > time.time():
+            g.db_manager.use_primary()
+    return g.db_manager
+
+def remember_primary(response):
+    """After a request that wrote, pin the client's next requests to the primary"""
+    db_manager = g.get('db_manager')
+    if db.REPLICA_URL and db_manager is not None and db_manager.wrote:
+        session['primary_until'] = time.time() + REPLICA_STICKY_SECONDS
+    return response
+
+def close_db_manager(exception=None):
+    """Close the request's database session when the app context ends"""
+    db_manager = g.pop('db_manager', None)
+    if db_manager is not None:
+        db_manager.close()
+
+def get_current_user():
+    """Get the logged in user, if any, using the request's database session"""
+    if 'user_id' not in session:
+        return None
+    return get_db_manager().get_user_by_id(session['user_id'])
+
+def get_page_limit():
+    """Read the ?limit= page size for history, capped at TRACK_MAX_PAGE_SIZE"""
+    limit = min(request.args.get('limit', TRACK_PAGE_SIZE, type=int), TRACK_MAX_PAGE_SIZE)
+    if limit < 1:
+        abort(400, description='limit must be a positive integer')
+    return limit
+
+# The parameters of a history page (/track, /api/v1/history)
+HistoryArgs = namedtuple('HistoryArgs', 'user_id limit returned_cursor donated_cursor all_history')
+
+def get_history_args():
+    """Read the history page parameters; a malformed cursor is a 400"""
+    args = HistoryArgs(
+        user_id=session.get('user_id'),
+        limit=get_page_limit(),
+        returned_cursor=request.args.get('returned_cursor'),
+        donated_cursor=request.args.get('donated_cursor'),
+        # Returned history is limited to recent months unless ?history=all
+        all_history=request.args.get('history') == 'all',
+    )
+    for cursor in (args.returned_cursor, args.donated_cursor):
+        if cursor is not None:
+            try:
+                decode_cursor(cursor)
+            except ValueError:
+                abort(400, description='malformed cursor')
+    return args
+
+# Initialize car rental system (the database is first touched on the first request)
+rental = RentalCars(INITIAL_CARS, db_manager_factory=get_db_manager)
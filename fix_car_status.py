@@ -19,6 +19,8 @@ def fix_car_status():
             print(f"Setting {car.name} as available")
             setattr(car, 'is_available', True)
             db.session.add(car)
+        # Tell every worker to drop its availability snapshot
+        db._bump_fleet_version()
         
         # Commit changes
         db.session.commit()
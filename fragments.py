@@ -0,0 +1,84 @@
+"""
+Cached HTML fragments for the car card grids.
+
+Pages render their car lists through the car_card() template helper. Each
+card is rendered from car_card.html once and then reused for as long as
+what it shows is unchanged: the car's name, image and availability, and
+the image files behind it (content hash and resized variants). A borrow
+therefore re-renders one card, not the whole grid, and a page render is
+mostly joining cached strings. The cache is per process and bounded.
+"""
+
+import os
+import threading
+from collections import OrderedDict
+from flask import current_app, render_template, request
+from markupsafe import Markup
+from Car import CarCard
+import assets
+import images
+
+# Fragments kept per process; the least recently used are dropped first
+MAX_FRAGMENTS = int(os.getenv('FRAGMENT_CACHE_SIZE', '2048'))
+DEFAULT_CAR_IMAGE = 'cars/image.png'
+# tile: home page grid, row: /list, thumb: just the picture (e.g. /track)
+LAYOUTS = ('tile', 'row', 'thumb')
+
+class FragmentCache:
+    """Thread-safe LRU cache of rendered fragments"""
+
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self._lock = threading.Lock()
+        self._fragments = OrderedDict()
+
+    def get_or_render(self, key, render):
+        with self._lock:
+            if key in self._fragments:
+                self._fragments.move_to_end(key)
+                return self._fragments[key]
+        # Render outside the lock; two threads may render the same key once
+        fragment = render()
+        with self._lock:
+            self._fragments[key] = fragment
+            while len(self._fragments) > self.max_size:
+                self._fragments.popitem(last=False)
+        return fragment
+
+    def clear(self):
+        with self._lock:
+            self._fragments.clear()
+
+    def __len__(self):
+        return len(self._fragments)
+
+car_cards = FragmentCache(MAX_FRAGMENTS)
+
+def _image_state(image):
+    """What a card's markup depends on besides the image path itself"""
+    if image.startswith(('http://', 'https://')):
+        return None
+    static_folder = current_app.static_folder
+    return assets.fingerprint(static_folder, image), images.image_variant(static_folder, image, 'thumb', 'webp')
+
+def car_card(car, layout='row', name=None):
+    """Template helper: the HTML of one car card, rendered once per car state.
+
+    car is a CarCard, a Car row, or None for a car that is not in the
+    catalog (then name is shown with the default image).
+    """
+    if layout not in LAYOUTS:
+        raise ValueError(f"layout must be one of {', '.join(LAYOUTS)}")
+    if car is None:
+        card = CarCard(name, None, False)
+    else:
+        card = CarCard(name or car.name, car.image, bool(car.is_available))
+    image = card.image or DEFAULT_CAR_IMAGE
+    key = (layout, card, _image_state(image), request.script_root)
+    return car_cards.get_or_render(
+        key, lambda: Markup(render_template('car_card.html', car=card, image=image, layout=layout))
+    )
+
+def init_app(app):
+    """Add the car_card() template helper"""
+    app.add_template_global(car_card)
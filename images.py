@@ -0,0 +1,184 @@
+"""
+Resized WebP/JPEG variants of car photos and profile uploads.
+
+Each source image under static/ gets a variants/ directory next to it
+holding one WebP and one JPEG per size:
+
+    static/cars/AMG GLS.jpeg -> static/cars/variants/AMG GLS-thumb.webp
+                                static/cars/variants/AMG GLS-thumb.jpg
+                                ... (card, full)
+
+Templates pick a size with image_variant() and fall back to the original
+file until its variants exist. Generating them needs Pillow
+(`pip install Pillow`); without it the originals are served as before.
+import_image() copies a remote or local image into static/ first.
+"""
+
+import mimetypes
+import os
+import posixpath
+import urllib.request
+from urllib.parse import urlparse
+
+try:
+    from PIL import Image, ImageOps, UnidentifiedImageError
+except ImportError:
+    Image = None
+
+PILLOW_AVAILABLE = Image is not None
+
+# Bounding box (width, height) of each variant; aspect ratio is kept.
+# Sized for 2x screens: thumb for the 84px list/track thumbnails and the
+# 100px profile picture, card for car cards, full for detail views.
+VARIANTS = {
+    'thumb': (200, 200),
+    'card': (640, 640),
+    'full': (1600, 1600),
+}
+FORMATS = ('webp', 'jpg')
+WEBP_QUALITY = 80
+JPEG_QUALITY = 82
+SOURCE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.gif', '.webp')
+# Limits for downloading remote images in import_image()
+FETCH_TIMEOUT = 15  # seconds
+MAX_IMPORT_BYTES = 16 * 1024 * 1024
+
+# Static paths whose variants are known to exist (they are never removed
+# while the app runs, so only misses need a stat)
+_existing = set()
+
+def variant_path(path, variant, fmt='jpg'):
+    """Path of a variant relative to the same root as path (e.g. static/)"""
+    directory, filename = posixpath.split(path.replace(os.sep, '/'))
+    stem = posixpath.splitext(filename)[0]
+    return posixpath.join(directory, 'variants', f"{stem}-{variant}.{fmt}")
+
+def image_variant(static_folder, path, variant, fmt='jpg'):
+    """The static path of a generated variant of path, or None if there is none yet"""
+    if not path or path.startswith(('http://', 'https://')):
+        return None
+    candidate = variant_path(path, variant, fmt)
+    if candidate in _existing:
+        return candidate
+    if os.path.isfile(os.path.join(static_folder, candidate)):
+        _existing.add(candidate)
+        return candidate
+    return None
+
+def _save(image, target, fmt):
+    tmp = target + '.tmp'
+    if fmt == 'webp':
+        image.save(tmp, 'WEBP', quality=WEBP_QUALITY, method=4)
+    else:
+        if image.mode != 'RGB':
+            # JPEG has no alpha channel: flatten onto white
+            background = Image.new('RGB', image.size, (255, 255, 255))
+            background.paste(image, mask=image.getchannel('A') if 'A' in image.getbands() else None)
+            image = background
+        image.save(tmp, 'JPEG', quality=JPEG_QUALITY, optimize=True, progressive=True)
+    # Readers never see a half-written file
+    os.replace(tmp, target)
+
+def generate_variants(source, force=False):
+    """Write every size/format variant of the image file source.
+
+    Variants newer than the source are kept unless force is set. Returns
+    the paths written. Raises ValueError if source is not a readable image
+    and RuntimeError if Pillow is not installed.
+    """
+    if not PILLOW_AVAILABLE:
+        raise RuntimeError("Pillow is not installed; run `pip install Pillow`")
+    directory, filename = os.path.split(source)
+    targets = {
+        (variant, fmt): os.path.join(directory, variant_path(filename, variant, fmt))
+        for variant in VARIANTS for fmt in FORMATS
+    }
+    source_mtime = os.path.getmtime(source)
+    if not force:
+        targets = {key: target for key, target in targets.items()
+                   if not os.path.exists(target) or os.path.getmtime(target) < source_mtime}
+    if not targets:
+        return []
+
+    try:
+        with Image.open(source) as original:
+            # Let the JPEG decoder downscale while decoding large photos
+            original.draft('RGB', max(VARIANTS.values()))
+            image = ImageOps.exif_transpose(original)
+            image = image.convert('RGBA' if image.mode in ('RGBA', 'LA', 'P') else 'RGB')
+    except (UnidentifiedImageError, OSError) as e:
+        raise ValueError(f"{filename} is not a readable image: {e}")
+    # Only once the image decoded, so a bad upload leaves nothing behind
+    os.makedirs(os.path.join(directory, 'variants'), exist_ok=True)
+
+    written = []
+    # Largest first, each size is downscaled from the one before it
+    for variant, size in sorted(VARIANTS.items(), key=lambda item: item[1], reverse=True):
+        image.thumbnail(size, Image.LANCZOS)
+        for fmt in FORMATS:
+            target = targets.get((variant, fmt))
+            if target is not None:
+                _save(image, target, fmt)
+                written.append(target)
+    return written
+
+def remove_variants(source):
+    """Delete the variants of the image file source, and variants/ if that empties it"""
+    directory, filename = os.path.split(source)
+    for variant in VARIANTS:
+        for fmt in FORMATS:
+            path = os.path.join(directory, variant_path(filename, variant, fmt))
+            if os.path.exists(path):
+                os.remove(path)
+    try:
+        os.rmdir(os.path.join(directory, 'variants'))
+    except OSError:
+        # Missing, or still holding other images' variants
+        pass
+
+def source_images(directory):
+    """Image files directly inside directory (not previously generated variants)"""
+    if not os.path.isdir(directory):
+        return []
+    return sorted(
+        os.path.join(directory, name) for name in os.listdir(directory)
+        if name.lower().endswith(SOURCE_EXTENSIONS) and os.path.isfile(os.path.join(directory, name))
+    )
+
+def _download(url):
+    request = urllib.request.Request(url, headers={'User-Agent': 'LCS car image importer'})
+    with urllib.request.urlopen(request, timeout=FETCH_TIMEOUT) as response:
+        content_type = response.headers.get_content_type()
+        if not content_type.startswith('image/'):
+            raise ValueError(f"{url} is not an image ({content_type})")
+        data = response.read(MAX_IMPORT_BYTES + 1)
+    ext = posixpath.splitext(urlparse(url).path)[1].lower()
+    if ext not in SOURCE_EXTENSIONS:
+        ext = mimetypes.guess_extension(content_type) or ''
+    return data, ext
+
+def import_image(source, directory, stem):
+    """Copy an image from a URL or local file into directory as stem + extension.
+
+    Returns the new file name. Raises ValueError for anything that is not
+    an image file and OSError if it cannot be fetched or read.
+    """
+    if source.startswith(('http://', 'https://')):
+        data, ext = _download(source)
+    else:
+        with open(source, 'rb') as f:
+            data = f.read(MAX_IMPORT_BYTES + 1)
+        ext = os.path.splitext(source)[1].lower()
+    if len(data) > MAX_IMPORT_BYTES:
+        raise ValueError(f"{source} is larger than {MAX_IMPORT_BYTES // (1024 * 1024)} MB")
+    if ext == '.jpe':
+        ext = '.jpg'
+    if ext not in SOURCE_EXTENSIONS:
+        raise ValueError(f"{source} does not look like an image file")
+    filename = stem.replace('/', '-').replace(os.sep, '-') + ext
+    os.makedirs(directory, exist_ok=True)
+    target = os.path.join(directory, filename)
+    with open(target + '.tmp', 'wb') as f:
+        f.write(data)
+    os.replace(target + '.tmp', target)
+    return filename
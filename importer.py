@@ -0,0 +1,238 @@
+"""
+Bulk import of cars, borrowers and rental history from CSV or NDJSON.
+
+Records are loaded in chunks, each in its own transaction: COPY on
+Postgres, a single executemany INSERT elsewhere. The number of records
+committed per source is stored in import_progress in the same
+transaction, so re-running an interrupted import skips what is already
+loaded instead of duplicating it.
+
+Expected fields:
+    cars       name, is_available (optional, default true)
+    borrowers  name, email (optional), phone (optional)
+    rentals    borrower_name, car_name, borrowed_at, returned_at (optional;
+               rentals without it are imported as open loans)
+"""
+
+import csv
+import io
+import json
+import os
+from datetime import datetime
+from itertools import islice
+from sqlalchemy import select, update
+from db_manager import DatabaseManager
+from models import Borrower, Car, BorrowedCar, ReturnedCar, ImportProgress
+
+KINDS = ('cars', 'borrowers', 'rentals')
+FORMATS = ('csv', 'ndjson')
+# Records committed per transaction
+CHUNK_SIZE = 5000
+
+_TRUE = {'1', 'true', 't', 'yes', 'y'}
+_FALSE = {'0', 'false', 'f', 'no', 'n'}
+
+def read_records(path, fmt=None):
+    """Yield records from a CSV or NDJSON file as dicts; fmt defaults from the extension"""
+    fmt = fmt or ('ndjson' if path.endswith(('.ndjson', '.jsonl')) else 'csv')
+    with open(path, newline='' if fmt == 'csv' else None, encoding='utf-8') as f:
+        if fmt == 'csv':
+            yield from csv.DictReader(f)
+        else:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+def _text(record, field, line, required=True):
+    value = record.get(field)
+    if value is None or (isinstance(value, str) and not value.strip()):
+        if required:
+            raise ValueError(f"Record {line}: '{field}' is required")
+        return None
+    return str(value).strip()
+
+def _timestamp(record, field, line, required=True):
+    value = record.get(field)
+    if value in (None, ''):
+        if required:
+            raise ValueError(f"Record {line}: '{field}' is required")
+        return None
+    try:
+        return datetime.fromisoformat(str(value).strip())
+    except ValueError:
+        raise ValueError(f"Record {line}: '{field}' is not an ISO 8601 timestamp: {value!r}")
+
+def _boolean(record, field, line, default):
+    value = record.get(field)
+    if value in (None, ''):
+        return default
+    if isinstance(value, bool):
+        return value
+    if str(value).strip().lower() in _TRUE:
+        return True
+    if str(value).strip().lower() in _FALSE:
+        return False
+    raise ValueError(f"Record {line}: '{field}' is not a boolean: {value!r}")
+
+def _copy_value(value):
+    if value is None:
+        return None
+    return value.isoformat() if isinstance(value, datetime) else value
+
+def load_rows(db_manager, table, columns, rows):
+    """Insert rows (tuples in column order) in the session's transaction.
+
+    Uses COPY ... FROM STDIN on Postgres and one executemany INSERT on
+    other databases.
+    """
+    if not rows:
+        return
+    connection = db_manager.session.connection()
+    if connection.dialect.name == 'postgresql':
+        buffer = io.StringIO()
+        # Unquoted empty fields are NULL in COPY's CSV format
+        csv.writer(buffer).writerows([_copy_value(value) for value in row] for row in rows)
+        buffer.seek(0)
+        cursor = connection.connection.dbapi_connection.cursor()
+        try:
+            cursor.copy_expert(
+                f"COPY {table.name} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)", buffer
+            )
+        finally:
+            cursor.close()
+    else:
+        connection.execute(table.insert(), [dict(zip(columns, row)) for row in rows])
+
+def _ids_by_name(db_manager, model, names):
+    """Map names to ids; for duplicate borrower names the oldest row wins"""
+    rows = db_manager.session.execute(
+        select(model.id, model.name).where(model.name.in_(names)).order_by(model.id.desc())
+    )
+    return {name: row_id for row_id, name in rows}
+
+def _import_cars(db_manager, records, first_line):
+    cars = {}
+    for line, record in enumerate(records, first_line):
+        cars[_text(record, 'name', line)] = _boolean(record, 'is_available', line, True)
+    existing = _ids_by_name(db_manager, Car, list(cars))
+    rows = [(name, available) for name, available in cars.items() if name not in existing]
+    load_rows(db_manager, Car.__table__, ['name', 'is_available'], rows)
+    if rows:
+        db_manager._bump_fleet_version()
+    return len(rows)
+
+def _import_borrowers(db_manager, records, first_line):
+    borrowers = {}
+    for line, record in enumerate(records, first_line):
+        name = _text(record, 'name', line)
+        borrowers[name] = (name, _text(record, 'email', line, False), _text(record, 'phone', line, False),
+                           datetime.utcnow())
+    existing = _ids_by_name(db_manager, Borrower, list(borrowers))
+    rows = [row for name, row in borrowers.items() if name not in existing]
+    load_rows(db_manager, Borrower.__table__, ['name', 'email', 'phone', 'created_at'], rows)
+    return len(rows)
+
+def _ensure_ids(db_manager, model, names, columns, make_row):
+    """Ids for names, creating the missing ones in bulk; returns (ids, number created)"""
+    ids = _ids_by_name(db_manager, model, names)
+    missing = [name for name in names if name not in ids]
+    if missing:
+        load_rows(db_manager, model.__table__, columns, [make_row(name) for name in missing])
+        ids.update(_ids_by_name(db_manager, model, missing))
+    return ids, len(missing)
+
+def _import_rentals(db_manager, records, first_line):
+    rentals = []
+    for line, record in enumerate(records, first_line):
+        rentals.append((
+            _text(record, 'borrower_name', line),
+            _text(record, 'car_name', line),
+            _timestamp(record, 'borrowed_at', line),
+            _timestamp(record, 'returned_at', line, required=False),
+        ))
+    borrower_ids, _ = _ensure_ids(
+        db_manager, Borrower, list(dict.fromkeys(rental[0] for rental in rentals)),
+        ['name', 'created_at'], lambda name: (name, datetime.utcnow())
+    )
+    car_ids, cars_created = _ensure_ids(
+        db_manager, Car, list(dict.fromkeys(rental[1] for rental in rentals)),
+        ['name', 'is_available'], lambda name: (name, True)
+    )
+    returned, borrowed = [], []
+    for borrower_name, car_name, borrowed_at, returned_at in rentals:
+        row = (borrower_ids[borrower_name], car_ids[car_name], borrowed_at)
+        if returned_at is None:
+            borrowed.append(row + (False,))
+        else:
+            returned.append(row + (returned_at,))
+    load_rows(db_manager, ReturnedCar.__table__, ['borrower_id', 'car_id', 'borrowed_at', 'returned_at'], returned)
+    load_rows(db_manager, BorrowedCar.__table__, ['borrower_id', 'car_id', 'borrowed_at', 'returned'], borrowed)
+    if borrowed:
+        # Cars out on an imported open loan are not available
+        db_manager.session.execute(
+            update(Car).where(Car.id.in_({row[1] for row in borrowed})).values(is_available=False)
+        )
+    if borrowed or cars_created:
+        db_manager._bump_fleet_version()
+    return len(rentals)
+
+_IMPORTERS = {
+    'cars': _import_cars,
+    'borrowers': _import_borrowers,
+    'rentals': _import_rentals,
+}
+
+def _save_progress(db_manager, source, records_done):
+    db_manager.session.execute(
+        db_manager._insert(ImportProgress)
+        .values(source=source, records_done=records_done, updated_at=datetime.utcnow())
+        .on_conflict_do_update(
+            index_elements=['source'],
+            set_={'records_done': records_done, 'updated_at': datetime.utcnow()},
+        )
+    )
+
+def source_key(kind, path):
+    """Identify an import source in import_progress"""
+    return f"{kind}:{os.path.abspath(path)}"
+
+def import_records(kind, records, source, chunk_size=CHUNK_SIZE, restart=False, progress=None):
+    """Import records of the given kind, resuming after the last committed chunk.
+
+    source names the input in import_progress; restart ignores any saved
+    progress. progress, if given, is called with the running record count
+    after each chunk. Returns (records_imported_now, records_skipped).
+    Rental imports finish by rebuilding the per-user rental summaries.
+    """
+    if kind not in _IMPORTERS:
+        raise ValueError(f"kind must be one of {', '.join(KINDS)}")
+    db_manager = DatabaseManager()
+    db_manager.use_primary()
+    try:
+        saved = None if restart else db_manager.session.get(ImportProgress, source)
+        skipped = saved.records_done if saved else 0
+        records = iter(records)
+        for _ in islice(records, skipped):
+            pass
+
+        done = skipped
+        while True:
+            chunk = list(islice(records, chunk_size))
+            if not chunk:
+                break
+            try:
+                _IMPORTERS[kind](db_manager, chunk, done + 1)
+                done += len(chunk)
+                _save_progress(db_manager, source, done)
+                db_manager.session.commit()
+            except Exception:
+                db_manager.session.rollback()
+                raise
+            if progress is not None:
+                progress(done)
+
+        if kind == 'rentals' and done > skipped:
+            db_manager.rebuild_rental_summaries()
+        return done - skipped, skipped
+    finally:
+        db_manager.close()
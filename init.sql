@@ -1,16 +1,26 @@
 -- Create tables if they don't exist
+CREATE TABLE IF NOT EXISTS users (
+    id SERIAL PRIMARY KEY,
+    name VARCHAR(100) NOT NULL,
+    email VARCHAR(100) NOT NULL UNIQUE,
+    profile_image VARCHAR(200),
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
 CREATE TABLE IF NOT EXISTS borrowers (
     id SERIAL PRIMARY KEY,
     name VARCHAR(100) NOT NULL,
     email VARCHAR(100),
     phone VARCHAR(20),
-    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    user_id INTEGER REFERENCES users(id)
 );
 
 CREATE TABLE IF NOT EXISTS cars (
     id SERIAL PRIMARY KEY,
     name VARCHAR(100) NOT NULL UNIQUE,
     is_available BOOLEAN DEFAULT TRUE,
+    image VARCHAR(500),
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
 
@@ -22,26 +32,90 @@ CREATE TABLE IF NOT EXISTS borrowed_cars (
     returned BOOLEAN DEFAULT FALSE
 );
 
+-- Closed loans moved out of borrowed_cars by `flask --app app archive`
+CREATE TABLE IF NOT EXISTS borrowed_cars_archive (
+    id INTEGER PRIMARY KEY,
+    borrower_id INTEGER REFERENCES borrowers(id),
+    car_id INTEGER REFERENCES cars(id),
+    borrowed_at TIMESTAMP,
+    archived_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- `flask --app app archive --partition` converts this to monthly partitions
 CREATE TABLE IF NOT EXISTS returned_cars (
     id SERIAL PRIMARY KEY,
     borrower_id INTEGER REFERENCES borrowers(id),
     car_id INTEGER REFERENCES cars(id),
     borrowed_at TIMESTAMP,
-    returned_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    returned_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
 );
 
+CREATE TABLE IF NOT EXISTS donated_cars (
+    id SERIAL PRIMARY KEY,
+    donor_name VARCHAR(100) NOT NULL,
+    car_name VARCHAR(100) NOT NULL,
+    donated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    car_id INTEGER REFERENCES cars(id)
+);
+
+CREATE TABLE IF NOT EXISTS fleet_version (
+    id INTEGER PRIMARY KEY,
+    version INTEGER NOT NULL DEFAULT 0
+);
+
+INSERT INTO fleet_version (id, version) VALUES (1, 0) ON CONFLICT (id) DO NOTHING;
+
+-- Per-user rental totals, maintained by borrow/return (`flask --app app rebuild-summaries` backfills)
+CREATE TABLE IF NOT EXISTS user_rental_summaries (
+    user_id INTEGER PRIMARY KEY REFERENCES users(id) ON DELETE CASCADE,
+    rentals_count INTEGER NOT NULL DEFAULT 0,
+    active_loans INTEGER NOT NULL DEFAULT 0,
+    total_days_rented DOUBLE PRECISION NOT NULL DEFAULT 0,
+    last_rental_at TIMESTAMP
+);
+
+-- Resume points for `flask --app app import`
+CREATE TABLE IF NOT EXISTS import_progress (
+    source VARCHAR(500) PRIMARY KEY,
+    records_done INTEGER NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS jobs (
+    id SERIAL PRIMARY KEY,
+    kind VARCHAR(50) NOT NULL,
+    payload TEXT NOT NULL,
+    status VARCHAR(20) NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    error TEXT,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Indexes for the borrow/return and history lookups (kept in sync with models.py)
+CREATE INDEX IF NOT EXISTS ix_borrowers_name ON borrowers (name);
+CREATE INDEX IF NOT EXISTS ix_borrowers_user_id ON borrowers (user_id);
+CREATE INDEX IF NOT EXISTS ix_borrowed_cars_borrower_car_returned ON borrowed_cars (borrower_id, car_id, returned);
+CREATE INDEX IF NOT EXISTS ix_borrowed_cars_returned ON borrowed_cars (returned);
+CREATE INDEX IF NOT EXISTS ix_borrowed_cars_open ON borrowed_cars (car_id) WHERE returned = false;
+CREATE INDEX IF NOT EXISTS ix_borrowed_cars_archive_borrower_id ON borrowed_cars_archive (borrower_id);
+CREATE INDEX IF NOT EXISTS ix_returned_cars_borrower_id ON returned_cars (borrower_id);
+CREATE INDEX IF NOT EXISTS ix_returned_cars_returned_at_id ON returned_cars (returned_at, id);
+CREATE INDEX IF NOT EXISTS ix_donated_cars_donated_at_id ON donated_cars (donated_at, id);
+CREATE INDEX IF NOT EXISTS ix_jobs_status_id ON jobs (status, id);
+
 -- Insert initial cars if they don't exist
-INSERT INTO cars (name, is_available) VALUES
-    ('ORACLE REDBULL RB20', TRUE),
-    ('AMG GLS', TRUE),
-    ('FERRARI 296 GTB', TRUE),
-    ('APX GP', TRUE),
-    ('MCLAREN 720S', TRUE),
-    ('LAMBORGHINI HURACÁN', TRUE),
-    ('BUGATTI CHIRON', TRUE),
-    ('ASTON MARTIN VANTAGE', TRUE),
-    ('PORSCHE 911', TRUE),
-    ('BMW M3', TRUE),
-    ('AUDI R8', TRUE),
-    ('TESLA MODEL S', TRUE)
+INSERT INTO cars (name, is_available, image) VALUES
+    ('ORACLE REDBULL RB20', TRUE, 'cars/ORACLE REDBULL RB20.jpg'),
+    ('AMG GLS', TRUE, 'cars/AMG GLS.jpeg'),
+    ('FERRARI 296 GTB', TRUE, 'cars/FERRARI 296 GTB.jpg'),
+    ('APX GP', TRUE, 'cars/apx gp.jpg'),
+    ('MCLAREN 720S', TRUE, 'cars/MCLAREN 720S.jpeg'),
+    ('LAMBORGHINI HURACÁN', TRUE, 'cars/LAMBORGHINI HURACÁN.jpeg'),
+    ('BUGATTI CHIRON', TRUE, 'cars/BUGATTI CHIRON.jpeg'),
+    ('ASTON MARTIN VANTAGE', TRUE, 'https://upload.wikimedia.org/wikipedia/commons/thumb/5/5a/2019_Aston_Martin_Vantage_V8_Automatic_4.0_Front.jpg/640px-2019_Aston_Martin_Vantage_V8_Automatic_4.0_Front.jpg'),
+    ('PORSCHE 911', TRUE, 'cars/PORSCHE 911.jpeg'),
+    ('BMW M3', TRUE, 'cars/BMW M3.jpeg'),
+    ('AUDI R8', TRUE, 'cars/AUDI R8.jpeg'),
+    ('TESLA MODEL S', TRUE, NULL)
 ON CONFLICT (name) DO NOTHING;
\ No newline at end of file
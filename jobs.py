@@ -0,0 +1,217 @@
+"""
+A small background job queue backed by the jobs table.
+
+enqueue() records a job and hands it to a thread pool in this process, so
+the request that created it can return right away. Jobs are claimed with a
+conditional UPDATE, so a job is never run twice even when several
+processes (or `flask --app app jobs`) look at the same table. Failed jobs
+stay pending and are retried after a growing delay, up to MAX_ATTEMPTS
+times; jobs still pending or stuck running after a crash are picked up by
+`flask --app app jobs`.
+
+Register a handler with @job('kind'); it is called with the job's JSON
+payload as keyword arguments. A handler raising ValueError fails the job
+for good (bad input), any other exception retries it.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import shutil
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from sqlalchemy import select, update
+from db_manager import DatabaseManager
+from models import Job
+import images
+
+# Threads running jobs in each process; 0 runs them inline in enqueue()
+WORKERS = int(os.getenv('JOB_WORKERS', '2'))
+MAX_ATTEMPTS = 3
+# Seconds before the first retry of a failed job, doubled for each later one
+RETRY_DELAY = float(os.getenv('JOB_RETRY_DELAY', '30'))
+# Running jobs not finished after this long are assumed lost with their process
+STALE_AFTER = int(os.getenv('JOB_STALE_AFTER', '600'))  # seconds
+
+logger = logging.getLogger(__name__)
+
+_handlers = {}
+_executor = None
+_executor_lock = threading.Lock()
+# Retries waiting for their delay, cancelled by shutdown()
+_retry_timers = set()
+
+def job(kind):
+    """Register the decorated function as the handler for jobs of this kind"""
+    def register(handler):
+        _handlers[kind] = handler
+        return handler
+    return register
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=WORKERS, thread_name_prefix='job')
+    return _executor
+
+def submit(job_id):
+    """Run a recorded job in the background (or now, with WORKERS = 0)"""
+    if WORKERS <= 0:
+        run_job(job_id)
+    else:
+        _get_executor().submit(run_job, job_id)
+
+def _retry_later(job_id, attempts):
+    """Submit a failed job again once its backoff delay has passed"""
+    delay = RETRY_DELAY * 2 ** (attempts - 1)
+    if delay <= 0:
+        submit(job_id)
+        return
+
+    def retry():
+        with _executor_lock:
+            _retry_timers.discard(timer)
+        submit(job_id)
+
+    timer = threading.Timer(delay, retry)
+    timer.daemon = True
+    with _executor_lock:
+        _retry_timers.add(timer)
+    timer.start()
+
+def enqueue(kind, **payload):
+    """Record a job and start it in the background; returns the job id"""
+    if kind not in _handlers:
+        raise ValueError(f"No handler for job kind '{kind}'")
+    db_manager = DatabaseManager()
+    db_manager.use_primary()
+    try:
+        record = Job(kind=kind, payload=json.dumps(payload))
+        db_manager.session.add(record)
+        db_manager.session.commit()
+        job_id = record.id
+    except Exception:
+        db_manager.session.rollback()
+        raise
+    finally:
+        db_manager.close()
+    submit(job_id)
+    return job_id
+
+def _finish(db_manager, job_id, status, error=None):
+    db_manager.session.execute(
+        update(Job).where(Job.id == job_id).values(status=status, error=error, updated_at=datetime.utcnow())
+    )
+    db_manager.session.commit()
+
+def run_job(job_id):
+    """Claim and run one pending job; returns True if it ran successfully"""
+    db_manager = DatabaseManager()
+    db_manager.use_primary()
+    try:
+        claimed = db_manager.session.execute(
+            update(Job)
+            .where(Job.id == job_id, Job.status == 'pending')
+            .values(status='running', attempts=Job.attempts + 1, updated_at=datetime.utcnow())
+            .returning(Job.kind, Job.payload, Job.attempts)
+        ).first()
+        db_manager.session.commit()
+        if claimed is None:
+            # Already taken by another worker, or no longer pending
+            return False
+        kind, payload, attempts = claimed
+        try:
+            _handlers[kind](**json.loads(payload))
+        except Exception as e:
+            retry = not isinstance(e, (ValueError, KeyError)) and attempts < MAX_ATTEMPTS
+            logger.exception("Job %s (%s) failed on attempt %s", job_id, kind, attempts)
+            _finish(db_manager, job_id, 'pending' if retry else 'failed', str(e))
+            if retry:
+                # Left pending meanwhile, so `flask --app app jobs` can also pick it up
+                _retry_later(job_id, attempts)
+            return False
+        _finish(db_manager, job_id, 'done')
+        return True
+    except Exception:
+        db_manager.session.rollback()
+        raise
+    finally:
+        db_manager.close()
+
+def run_pending(limit=None):
+    """Run pending jobs (and requeue stale running ones) in this thread.
+
+    Returns (succeeded, failed) counts.
+    """
+    db_manager = DatabaseManager()
+    db_manager.use_primary()
+    try:
+        db_manager.session.execute(
+            update(Job)
+            .where(Job.status == 'running', Job.updated_at < datetime.utcnow() - timedelta(seconds=STALE_AFTER))
+            .values(status='pending', updated_at=datetime.utcnow())
+        )
+        db_manager.session.commit()
+        job_ids = db_manager.session.scalars(
+            select(Job.id).where(Job.status == 'pending').order_by(Job.id).limit(limit)
+        ).all()
+    finally:
+        db_manager.close()
+    succeeded = sum(run_job(job_id) for job_id in job_ids)
+    return succeeded, len(job_ids) - succeeded
+
+def shutdown(wait=True):
+    """Stop the worker threads, by default after running the jobs already submitted.
+
+    Retries still waiting for their delay are dropped; the jobs stay
+    pending for `flask --app app jobs`.
+    """
+    global _executor
+    with _executor_lock:
+        for timer in _retry_timers:
+            timer.cancel()
+        _retry_timers.clear()
+        if _executor is not None:
+            _executor.shutdown(wait=wait)
+            _executor = None
+
+def _file_digest(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+@job('profile_image')
+def process_profile_image(user_id, path, upload_folder):
+    """Move a raw upload to its content-addressed name, resize it and attach it to the user.
+
+    Identical uploads share one file. Unreadable images are deleted and
+    fail the job.
+    """
+    if not os.path.exists(path):
+        raise ValueError(f"Upload {path} no longer exists")
+    ext = os.path.splitext(path)[1].lower()
+    filename = f"{_file_digest(path)[:20]}{ext}"
+    target = os.path.join(upload_folder, filename)
+    if os.path.exists(target):
+        os.remove(path)
+    else:
+        shutil.move(path, target)
+    if images.PILLOW_AVAILABLE:
+        try:
+            images.generate_variants(target)
+        except ValueError:
+            os.remove(target)
+            images.remove_variants(target)
+            raise
+
+    db_manager = DatabaseManager()
+    try:
+        db_manager.update_user_profile_image(user_id, f"uploads/{filename}")
+    finally:
+        db_manager.close()
@@ -0,0 +1,162 @@
+"""
+Set-based purge operations for test data, GDPR deletions and retention.
+
+Every purge runs as bulk DELETE ... WHERE statements in batches of at most
+batch_size rows, each batch in its own short transaction, so no table is
+locked for long. Purges are idempotent: an interrupted run can simply be
+repeated. With dry_run=True nothing is deleted and the number of rows that
+would be is returned instead.
+
+All functions return {table name: rows deleted (or matched)}.
+"""
+
+from sqlalchemy import delete, func, select, update
+from db_manager import DatabaseManager
+from models import (User, Borrower, Car, BorrowedCar, ArchivedBorrowedCar, ReturnedCar, DonatedCar,
+                    UserRentalSummary)
+
+# Rows deleted per statement/transaction
+BATCH_SIZE = 1000
+
+def _delete_in_batches(db_manager, model, condition, batch_size):
+    """DELETE rows of model matching condition, batch_size rows per transaction"""
+    key = model.__mapper__.primary_key[0]
+    deleted = 0
+    while True:
+        batch = select(key).where(condition).limit(batch_size)
+        try:
+            result = db_manager.session.execute(
+                delete(model).where(key.in_(batch)).execution_options(synchronize_session=False)
+            )
+            db_manager.session.commit()
+        except Exception:
+            db_manager.session.rollback()
+            raise
+        deleted += result.rowcount
+        if result.rowcount < batch_size:
+            return deleted
+
+def _purge(targets, batch_size=BATCH_SIZE, dry_run=False, before_delete=None, after_delete=None):
+    """Count or delete (model, condition) targets in order, children first"""
+    db_manager = DatabaseManager()
+    db_manager.use_primary()
+    try:
+        if dry_run:
+            return {
+                model.__tablename__: db_manager.session.execute(
+                    select(func.count()).select_from(model).where(condition)
+                ).scalar()
+                for model, condition in targets
+            }
+        if before_delete is not None:
+            before_delete(db_manager)
+        counts = {
+            model.__tablename__: _delete_in_batches(db_manager, model, condition, batch_size)
+            for model, condition in targets
+        }
+        if after_delete is not None:
+            after_delete(db_manager)
+        return counts
+    finally:
+        db_manager.close()
+
+def _release_cars(borrower_ids):
+    """Make cars on the purged borrowers' open loans available again"""
+    def release(db_manager):
+        try:
+            result = db_manager.session.execute(
+                update(Car)
+                .where(Car.id.in_(
+                    select(BorrowedCar.car_id).where(BorrowedCar.borrower_id.in_(borrower_ids),
+                                                     BorrowedCar.returned == False)
+                ))
+                .values(is_available=True)
+            )
+            if result.rowcount:
+                db_manager._bump_fleet_version()
+            db_manager.session.commit()
+        except Exception:
+            db_manager.session.rollback()
+            raise
+    return release
+
+def _borrower_targets(borrower_ids):
+    return [
+        (BorrowedCar, BorrowedCar.borrower_id.in_(borrower_ids)),
+        (ArchivedBorrowedCar, ArchivedBorrowedCar.borrower_id.in_(borrower_ids)),
+        (ReturnedCar, ReturnedCar.borrower_id.in_(borrower_ids)),
+        (Borrower, Borrower.id.in_(borrower_ids)),
+    ]
+
+def purge_borrowers(names, batch_size=BATCH_SIZE, dry_run=False):
+    """Delete borrowers with the given names and all of their rental records.
+
+    Cars they still had out become available, and the rental summaries of
+    any linked users are rebuilt.
+    """
+    names = list(names)
+    borrower_ids = select(Borrower.id).where(Borrower.name.in_(names))
+    user_ids = []
+
+    def remember_users(db_manager):
+        user_ids.extend(db_manager.session.execute(
+            select(Borrower.user_id).where(Borrower.name.in_(names), Borrower.user_id.isnot(None)).distinct()
+        ).scalars())
+        _release_cars(borrower_ids)(db_manager)
+
+    def rebuild_summaries(db_manager):
+        if user_ids:
+            db_manager.rebuild_rental_summaries(user_ids)
+
+    return _purge(_borrower_targets(borrower_ids), batch_size, dry_run, remember_users, rebuild_summaries)
+
+def purge_user(user_id, batch_size=BATCH_SIZE, dry_run=False):
+    """Delete a user account with its borrowers, rental records and summary"""
+    borrower_ids = select(Borrower.id).where(Borrower.user_id == user_id)
+    targets = _borrower_targets(borrower_ids) + [
+        (UserRentalSummary, UserRentalSummary.user_id == user_id),
+        (User, User.id == user_id),
+    ]
+    return _purge(targets, batch_size, dry_run, _release_cars(borrower_ids))
+
+def purge_cars(names, batch_size=BATCH_SIZE, dry_run=False):
+    """Delete cars with the given names with every loan, return and donation of them.
+
+    Borrowers are kept. Like purge_older_than, rental summaries keep their
+    totals until they are rebuilt.
+    """
+    names = list(names)
+    car_ids = select(Car.id).where(Car.name.in_(names))
+    targets = [
+        (BorrowedCar, BorrowedCar.car_id.in_(car_ids)),
+        (ArchivedBorrowedCar, ArchivedBorrowedCar.car_id.in_(car_ids)),
+        (ReturnedCar, ReturnedCar.car_id.in_(car_ids)),
+        (DonatedCar, DonatedCar.car_id.in_(car_ids) | DonatedCar.car_name.in_(names)),
+        (Car, Car.name.in_(names)),
+    ]
+
+    def bump_fleet_version(db_manager):
+        # Workers must drop the purged cars from their availability snapshots
+        if db_manager.session.execute(select(Car.id).where(Car.name.in_(names)).limit(1)).first():
+            try:
+                db_manager._bump_fleet_version()
+                db_manager.session.commit()
+            except Exception:
+                db_manager.session.rollback()
+                raise
+
+    return _purge(targets, batch_size, dry_run, bump_fleet_version)
+
+def purge_older_than(cutoff, batch_size=BATCH_SIZE, dry_run=False):
+    """Delete closed rental and donation history from before cutoff.
+
+    Open loans are never touched. Rental summaries keep their lifetime
+    totals; rebuild them afterwards to count only the remaining history.
+    """
+    targets = [
+        (BorrowedCar, (BorrowedCar.returned == True) & (BorrowedCar.borrowed_at < cutoff)),
+        (ArchivedBorrowedCar, ArchivedBorrowedCar.borrowed_at < cutoff),
+        (ReturnedCar, ReturnedCar.returned_at < cutoff),
+        (DonatedCar, DonatedCar.donated_at < cutoff),
+    ]
+    return _purge(targets, batch_size, dry_run)
@@ -0,0 +1,157 @@
+"""
+Opt-in per-request SQL and latency instrumentation.
+
+Enabled with ENABLE_METRICS=1 (or the METRICS_ENABLED app config). Every
+request then gets a Server-Timing header with its database and total time,
+and per-endpoint totals are served in Prometheus text format at /metrics.
+Totals are per process; scrape each worker separately.
+"""
+
+import threading
+import time
+from flask import Response, g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# Longest statement text kept for the slowest-query label
+STATEMENT_LABEL_LENGTH = 200
+
+class MetricsRegistry:
+    """Thread-safe per-endpoint request and query totals"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._endpoints = {}
+
+    def record(self, endpoint, request_seconds, queries, db_seconds, slowest_seconds, slowest_statement):
+        with self._lock:
+            stats = self._endpoints.setdefault(endpoint, {
+                'requests': 0,
+                'request_seconds': 0.0,
+                'queries': 0,
+                'db_seconds': 0.0,
+                'slowest_seconds': 0.0,
+                'slowest_statement': None,
+            })
+            stats['requests'] += 1
+            stats['request_seconds'] += request_seconds
+            stats['queries'] += queries
+            stats['db_seconds'] += db_seconds
+            if slowest_seconds > stats['slowest_seconds']:
+                stats['slowest_seconds'] = slowest_seconds
+                stats['slowest_statement'] = slowest_statement
+
+    def snapshot(self):
+        with self._lock:
+            return {endpoint: dict(stats) for endpoint, stats in self._endpoints.items()}
+
+    def reset(self):
+        with self._lock:
+            self._endpoints.clear()
+
+registry = MetricsRegistry()
+_listeners_installed = False
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if has_request_context() and 'metrics_queries' in g:
+        conn.info.setdefault('metrics_query_start', []).append(time.perf_counter())
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if has_request_context() and 'metrics_queries' in g:
+        starts = conn.info.get('metrics_query_start')
+        if not starts:
+            return
+        elapsed = time.perf_counter() - starts.pop()
+        g.metrics_queries += 1
+        g.metrics_db_seconds += elapsed
+        if elapsed > g.metrics_slowest_seconds:
+            g.metrics_slowest_seconds = elapsed
+            g.metrics_slowest_statement = statement
+
+def _install_engine_listeners():
+    """Listen on every Engine, so the lazily created engine is covered too"""
+    global _listeners_installed
+    if not _listeners_installed:
+        event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+        _listeners_installed = True
+
+def _start_request():
+    g.metrics_start = time.perf_counter()
+    g.metrics_queries = 0
+    g.metrics_db_seconds = 0.0
+    g.metrics_slowest_seconds = 0.0
+    g.metrics_slowest_statement = None
+
+def _finish_request(response):
+    if 'metrics_start' not in g:
+        return response
+    total_seconds = time.perf_counter() - g.metrics_start
+    response.headers.add('Server-Timing', (
+        f'db;dur={g.metrics_db_seconds * 1000:.2f};desc="{g.metrics_queries} queries", '
+        f'total;dur={total_seconds * 1000:.2f}'
+    ))
+    registry.record(
+        request.endpoint or 'unmatched',
+        total_seconds,
+        g.metrics_queries,
+        g.metrics_db_seconds,
+        g.metrics_slowest_seconds,
+        g.metrics_slowest_statement,
+    )
+    return response
+
+def _label(value):
+    """Escape a Prometheus label value"""
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', ' ')
+
+def render_prometheus(snapshot):
+    """Render registry totals (and pool usage, once connected) in Prometheus text format"""
+    import db_manager
+
+    lines = []
+    series = [
+        ('lcs_requests_total', 'counter', 'Requests handled', 'requests'),
+        ('lcs_request_duration_seconds_total', 'counter', 'Total time spent handling requests', 'request_seconds'),
+        ('lcs_db_queries_total', 'counter', 'SQL statements executed', 'queries'),
+        ('lcs_db_duration_seconds_total', 'counter', 'Total time spent executing SQL', 'db_seconds'),
+    ]
+    for name, kind, help_text, key in series:
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} {kind}')
+        for endpoint, stats in sorted(snapshot.items()):
+            lines.append(f'{name}{{endpoint="{_label(endpoint)}"}} {stats[key]}')
+
+    lines.append('# HELP lcs_db_slowest_query_seconds Slowest SQL statement seen per endpoint')
+    lines.append('# TYPE lcs_db_slowest_query_seconds gauge')
+    for endpoint, stats in sorted(snapshot.items()):
+        if stats['slowest_statement'] is None:
+            continue
+        statement = ' '.join(stats['slowest_statement'].split())[:STATEMENT_LABEL_LENGTH]
+        lines.append(
+            f'lcs_db_slowest_query_seconds{{endpoint="{_label(endpoint)}",statement="{_label(statement)}"}} '
+            f'{stats["slowest_seconds"]}'
+        )
+
+    engine = db_manager._engine
+    pool = engine.pool if engine is not None else None
+    if pool is not None and hasattr(pool, 'checkedout'):
+        lines.append('# HELP lcs_db_pool_checked_out Connections currently checked out of the pool')
+        lines.append('# TYPE lcs_db_pool_checked_out gauge')
+        lines.append(f'lcs_db_pool_checked_out {pool.checkedout()}')
+        lines.append('# HELP lcs_db_pool_overflow Connections open beyond the pool size')
+        lines.append('# TYPE lcs_db_pool_overflow gauge')
+        lines.append(f'lcs_db_pool_overflow {max(pool.overflow(), 0)}')
+    return '\n'.join(lines) + '\n'
+
+def metrics_view():
+    return Response(render_prometheus(registry.snapshot()), mimetype='text/plain; version=0.0.4')
+
+def init_app(app):
+    """Install the request hooks and /metrics endpoint if METRICS_ENABLED is set"""
+    if not app.config.get('METRICS_ENABLED'):
+        return
+    _install_engine_listeners()
+    app.before_request(_start_request)
+    app.after_request(_finish_request)
+    app.add_url_rule('/metrics', 'metrics', metrics_view)
@@ -1,4 +1,4 @@
-from sqlalchemy import create_engine, Column, Integer, String, DateTime, Boolean, ForeignKey
+from sqlalchemy import create_engine, Column, Integer, Float, String, Text, DateTime, Boolean, ForeignKey, Index, text
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, relationship
 from datetime import datetime
@@ -37,6 +37,11 @@ class Borrower(Base):
     
     # Relationship to borrowed cars
     borrowed_cars = relationship("BorrowedCar", back_populates="borrower")
+    
+    __table_args__ = (
+        Index('ix_borrowers_name', 'name'),
+        Index('ix_borrowers_user_id', 'user_id'),
+    )
 
 class Car(Base):
     __tablename__ = 'cars'
@@ -44,6 +49,9 @@ class Car(Base):
     id = Column(Integer, primary_key=True)
     name = Column(String(100), nullable=False, unique=True)
     is_available = Column(Boolean, default=True)
+    # Image path under static/ (e.g. cars/AMG GLS.jpeg), or a remote URL until
+    # `flask --app app car-images` self-hosts it
+    image = Column(String(500), nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow)
     
     # Relationships
@@ -62,6 +70,32 @@ class BorrowedCar(Base):
     # Relationships
     borrower = relationship("Borrower", back_populates="borrowed_cars")
     car = relationship("Car", back_populates="borrowed_records")
+    
+    __table_args__ = (
+        Index('ix_borrowed_cars_borrower_car_returned', 'borrower_id', 'car_id', 'returned'),
+        Index('ix_borrowed_cars_returned', 'returned'),
+        # Only open loans are ever looked up by car, so keep that index small
+        Index('ix_borrowed_cars_open', 'car_id',
+              postgresql_where=text('returned = false'),
+              sqlite_where=text('returned = 0')),
+    )
+
+class ArchivedBorrowedCar(Base):
+    """Closed loans moved out of borrowed_cars by the archival job.
+    
+    Keeps the original borrowed_cars id so records can be traced back.
+    """
+    __tablename__ = 'borrowed_cars_archive'
+    
+    id = Column(Integer, primary_key=True, autoincrement=False)
+    borrower_id = Column(Integer, ForeignKey('borrowers.id'))
+    car_id = Column(Integer, ForeignKey('cars.id'))
+    borrowed_at = Column(DateTime)
+    archived_at = Column(DateTime, default=datetime.utcnow)
+    
+    __table_args__ = (
+        Index('ix_borrowed_cars_archive_borrower_id', 'borrower_id'),
+    )
 
 class ReturnedCar(Base):
     __tablename__ = 'returned_cars'
@@ -70,11 +104,16 @@ class ReturnedCar(Base):
     borrower_id = Column(Integer, ForeignKey('borrowers.id'))
     car_id = Column(Integer, ForeignKey('cars.id'))
     borrowed_at = Column(DateTime)
-    returned_at = Column(DateTime, default=datetime.utcnow)
+    returned_at = Column(DateTime, nullable=False, default=datetime.utcnow)
     
     # Relationships
     borrower = relationship("Borrower")
     car = relationship("Car", back_populates="return_records")
+    
+    __table_args__ = (
+        Index('ix_returned_cars_borrower_id', 'borrower_id'),
+        Index('ix_returned_cars_returned_at_id', 'returned_at', 'id'),
+    )
 
 class DonatedCar(Base):
     __tablename__ = 'donated_cars'
@@ -82,8 +121,69 @@ class DonatedCar(Base):
     id = Column(Integer, primary_key=True)
     donor_name = Column(String(100), nullable=False)
     car_name = Column(String(100), nullable=False)
-    donated_at = Column(DateTime, default=datetime.utcnow)
+    donated_at = Column(DateTime, nullable=False, default=datetime.utcnow)
     
     # Relationship to car (if it exists in the cars table)
     car_id = Column(Integer, ForeignKey('cars.id'), nullable=True)
-    car = relationship("Car")
\ No newline at end of file
+    car = relationship("Car")
+    
+    __table_args__ = (
+        Index('ix_donated_cars_donated_at_id', 'donated_at', 'id'),
+    )
+
+class FleetVersion(Base):
+    """Single-row counter bumped whenever car availability changes.
+    
+    Workers compare it against their cached availability snapshot to
+    notice borrows, returns and donations made by other processes.
+    """
+    __tablename__ = 'fleet_version'
+    
+    id = Column(Integer, primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+
+class UserRentalSummary(Base):
+    """Per-user rental totals, kept up to date by borrow_car/return_car.
+    
+    Lets /profile and /track show a user's totals without scanning their
+    history. Rebuild from the history tables with `flask rebuild-summaries`.
+    """
+    __tablename__ = 'user_rental_summaries'
+    
+    user_id = Column(Integer, ForeignKey('users.id', ondelete='CASCADE'), primary_key=True)
+    rentals_count = Column(Integer, nullable=False, default=0)
+    active_loans = Column(Integer, nullable=False, default=0)
+    total_days_rented = Column(Float, nullable=False, default=0.0)
+    last_rental_at = Column(DateTime)
+
+class ImportProgress(Base):
+    """How many records of a bulk import source have been committed.
+    
+    Updated in the same transaction as each imported chunk, so an
+    interrupted import resumes exactly where it stopped.
+    """
+    __tablename__ = 'import_progress'
+    
+    source = Column(String(500), primary_key=True)
+    records_done = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, default=datetime.utcnow)
+
+class Job(Base):
+    """A unit of background work, run by the job queue in jobs.py"""
+    __tablename__ = 'jobs'
+    __table_args__ = (
+        # Finding pending jobs in submission order
+        Index('ix_jobs_status_id', 'status', 'id'),
+    )
+    
+    id = Column(Integer, primary_key=True)
+    kind = Column(String(50), nullable=False)
+    payload = Column(Text, nullable=False)  # JSON
+    status = Column(String(20), nullable=False, default='pending')  # pending, running, done or failed
+    attempts = Column(Integer, nullable=False, default=0)
+    error = Column(Text)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f"<Job(id={self.id}, kind='{self.kind}', status='{self.status}')>"
@@ -0,0 +1,106 @@
+"""
+Slow-query log with one-off EXPLAIN capture.
+
+Enabled by setting SLOW_QUERY_MS to a threshold in milliseconds. Any
+statement at or above it is logged to the 'slow_query' logger with the
+DatabaseManager method that issued it and the shape (types, never values)
+of its bound parameters. The first time a distinct statement is slow, its
+plan is captured with EXPLAIN (Postgres) or EXPLAIN QUERY PLAN (SQLite).
+"""
+
+import logging
+import sys
+import threading
+import time
+from sqlalchemy import event
+
+logger = logging.getLogger('slow_query')
+
+# Statement types it is safe to EXPLAIN without executing them
+EXPLAINABLE = ('SELECT', 'WITH', 'UPDATE', 'DELETE', 'INSERT')
+# Upper bound on distinct statements remembered as already explained
+MAX_EXPLAINED = 500
+
+_explained = set()
+_explained_lock = threading.Lock()
+
+def parameter_shape(parameters):
+    """Describe bound parameters by type only, so no user data is logged"""
+    if isinstance(parameters, dict):
+        return {key: type(value).__name__ for key, value in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        return [type(value).__name__ for value in parameters]
+    return type(parameters).__name__
+
+def calling_method():
+    """Name the outermost DatabaseManager method on the current call stack"""
+    method = None
+    frame = sys._getframe(1)
+    while frame is not None:
+        owner = frame.f_locals.get('self')
+        if owner is not None and type(owner).__name__ == 'DatabaseManager':
+            method = frame.f_code.co_name
+        frame = frame.f_back
+    return method
+
+def _should_explain(statement):
+    if not statement.lstrip().upper().startswith(EXPLAINABLE):
+        return False
+    with _explained_lock:
+        if statement in _explained or len(_explained) >= MAX_EXPLAINED:
+            return False
+        _explained.add(statement)
+        return True
+
+def explain(conn, statement, parameters):
+    """Capture the plan for statement on a separate cursor of the same connection.
+
+    The EXPLAIN runs inside a savepoint, so if it fails (e.g. on Postgres,
+    which would otherwise abort the whole transaction) the caller's
+    transaction carries on as if it had never run.
+    """
+    prefix = 'EXPLAIN QUERY PLAN ' if conn.dialect.name == 'sqlite' else 'EXPLAIN '
+    cursor = conn.connection.dbapi_connection.cursor()
+    try:
+        cursor.execute('SAVEPOINT slow_query_explain')
+        try:
+            cursor.execute(prefix + statement, parameters)
+            plan = '\n'.join(' '.join(str(column) for column in row) for row in cursor.fetchall())
+        except Exception:
+            cursor.execute('ROLLBACK TO SAVEPOINT slow_query_explain')
+            raise
+        finally:
+            cursor.execute('RELEASE SAVEPOINT slow_query_explain')
+        return plan
+    finally:
+        cursor.close()
+
+def install(engine, threshold_ms):
+    """Attach the slow-query listeners to engine"""
+    threshold = threshold_ms / 1000.0
+
+    @event.listens_for(engine, 'before_cursor_execute')
+    def _start_timer(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('slow_query_start', []).append(time.perf_counter())
+
+    @event.listens_for(engine, 'after_cursor_execute')
+    def _log_if_slow(conn, cursor, statement, parameters, context, executemany):
+        starts = conn.info.get('slow_query_start')
+        if not starts:
+            return
+        elapsed = time.perf_counter() - starts.pop()
+        if elapsed < threshold:
+            return
+        caller = calling_method() or 'unknown caller'
+        logger.warning(
+            "Slow query (%.1f ms) in %s: %s | parameters: %s",
+            elapsed * 1000,
+            caller,
+            ' '.join(statement.split()),
+            parameter_shape(parameters) if not executemany else f"executemany x{len(parameters)}",
+        )
+        if not executemany and _should_explain(statement):
+            try:
+                logger.warning("Plan for slow query in %s:\n%s", caller, explain(conn, statement, parameters))
+            except Exception as e:
+                logger.warning("Could not EXPLAIN slow query: %s", e)
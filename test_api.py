@@ -0,0 +1,76 @@
+"""
+Test script to verify the JSON API
+"""
+import unittest
+import app as app_module
+from db_manager import DatabaseManager
+from test_support import TestDataCleanup
+
+CAR_NAME = "API Test Car"
+BORROWER = "API Borrower"
+
+class TestApi(TestDataCleanup, unittest.TestCase):
+    test_borrowers = (BORROWER,)
+    test_cars = (CAR_NAME,)
+    
+    def setUp(self):
+        """Set up Flask test client and a test car"""
+        self.client = app_module.app.test_client()
+        self.db_manager = DatabaseManager()
+        self._remove_test_data()
+        self.db_manager.get_or_create_car(CAR_NAME)
+    
+    def tearDown(self):
+        """Clean up test data"""
+        self._remove_test_data()
+        self.db_manager.close()
+    
+    def test_borrow_and_return(self):
+        """Borrow/return round trip with conflict reporting"""
+        payload = {'borrower_name': BORROWER, 'car_name': CAR_NAME}
+        response = self.client.post('/api/v1/borrow', json=payload)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.get_json()['success'])
+        self.assertNotIn(CAR_NAME, self.client.get('/api/v1/cars').get_json()['cars'])
+        
+        response = self.client.post('/api/v1/borrow', json=payload)
+        self.assertEqual(response.status_code, 409)
+        self.assertFalse(response.get_json()['success'])
+        
+        history = self.client.get('/api/v1/history').get_json()
+        self.assertIn(CAR_NAME, [r['car_name'] for r in history['borrowed']])
+        
+        self.assertEqual(self.client.post('/api/v1/return', json=payload).status_code, 200)
+        self.assertEqual(self.client.post('/api/v1/return', json=payload).status_code, 409)
+        self.assertIn(CAR_NAME, self.client.get('/api/v1/cars').get_json()['cars'])
+    
+    def test_history_pagination(self):
+        """History pages carry a next cursor"""
+        payload = {'borrower_name': BORROWER, 'car_name': CAR_NAME}
+        for _ in range(2):
+            self.client.post('/api/v1/borrow', json=payload)
+            self.client.post('/api/v1/return', json=payload)
+        page = self.client.get('/api/v1/history?limit=1').get_json()['returned']
+        self.assertEqual(len(page['items']), 1)
+        self.assertIsNotNone(page['next_cursor'])
+        self.assertIn('returned_at', page['items'][0])
+    
+    def test_errors_are_json(self):
+        """Validation errors are reported as JSON"""
+        response = self.client.post('/api/v1/borrow', json={'car_name': CAR_NAME})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('borrower_name', response.get_json()['error'])
+        response = self.client.get('/api/v1/history?returned_cursor=bad')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('error', response.get_json())
+    
+    def test_non_object_json_body_is_rejected(self):
+        """A valid JSON body that is not an object is a 400, not a 500"""
+        for body in ([1], "x", 3):
+            for path in ('/api/v1/borrow', '/api/v1/return', '/api/v1/donate', '/api/v1/borrow/batch'):
+                response = self.client.post(path, json=body)
+                self.assertEqual(response.status_code, 400, (path, body))
+                self.assertEqual(response.get_json()['error'], 'request body must be a JSON object')
+
+if __name__ == '__main__':
+    unittest.main()
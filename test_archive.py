@@ -0,0 +1,140 @@
+"""
+Test script to verify archival of closed loans and the recent history window
+"""
+import unittest
+from datetime import datetime, timedelta
+import app as app_module
+import archive
+import db_manager as db
+from db_manager import DatabaseManager
+from models import Borrower, BorrowedCar, ArchivedBorrowedCar, ReturnedCar
+from test_support import TestDataCleanup, temporary_database
+
+class TestArchive(TestDataCleanup, unittest.TestCase):
+    test_borrowers = ("Archive Borrower",)
+    test_cars = ("Archive Car A", "Archive Car B")
+    
+    def setUp(self):
+        self.db_manager = DatabaseManager()
+        self._remove_test_data()
+    
+    def tearDown(self):
+        """Clean up test data"""
+        self._remove_test_data()
+        self.db_manager.close()
+    
+    def test_old_returns_need_all_history(self):
+        """Returns older than the recent window are only read on request"""
+        borrower = self.db_manager.add_borrower("Archive Borrower")
+        car = self.db_manager.get_or_create_car("Archive Car A")
+        now = datetime.now()
+        old = db.recent_history_start() - timedelta(days=1)
+        for returned_at in (now, old):
+            self.db_manager.session.add(ReturnedCar(
+                borrower_id=borrower.id, car_id=car.id, borrowed_at=returned_at, returned_at=returned_at
+            ))
+        self.db_manager.session.commit()
+        
+        def ours(records):
+            return [r for r in records if r.borrower_id == borrower.id]
+        
+        self.assertEqual(len(ours(self.db_manager.get_returned_cars())), 1)
+        self.assertEqual(len(ours(self.db_manager.get_returned_cars(all_history=True))), 2)
+    
+    def test_recent_history_start_is_month_aligned(self):
+        months = db.RECENT_HISTORY_MONTHS
+        db.RECENT_HISTORY_MONTHS = 2
+        try:
+            self.assertEqual(db.recent_history_start(datetime(2024, 1, 15)), datetime(2023, 11, 1))
+            self.assertEqual(db.recent_history_start(datetime(2024, 3, 31)), datetime(2024, 1, 1))
+        finally:
+            db.RECENT_HISTORY_MONTHS = months
+    
+    def test_partitioning_skipped_outside_postgres(self):
+        if db.get_engine().dialect.name == 'postgresql':
+            self.skipTest("Requires a non-Postgres database")
+        self.assertEqual(archive.partition_returned_cars(), [])
+        self.assertEqual(archive.ensure_returned_cars_partitions(), [])
+    
+    def test_partition_over_default_rows_moves_them(self):
+        """A month that piled up in the default partition gets its rows moved in"""
+        class Result:
+            def __init__(self, value):
+                self.value = value
+            def first(self):
+                return self.value
+            def scalar(self):
+                return self.value
+        
+        class Connection:
+            """Postgres stand-in: no partitions yet, default holds rows for March only"""
+            def __init__(self):
+                self.statements = []
+            def execute(self, statement, parameters=None):
+                sql = ' '.join(str(statement).split())
+                self.statements.append(sql)
+                if 'to_regclass' in sql:
+                    return Result(None)
+                if 'partdefid' in sql:
+                    return Result((1,))
+                if sql.startswith('SELECT 1 FROM returned_cars_default'):
+                    return Result((1,) if "'2024-03-01'" in sql else None)
+                return Result(None)
+        
+        conn = Connection()
+        created = archive._create_partitions(conn, datetime(2024, 3, 1), datetime(2024, 4, 1))
+        self.assertEqual(created, ["returned_cars_y2024m03", "returned_cars_y2024m04"])
+        changes = [sql.split(' (')[0] for sql in conn.statements if not sql.startswith('SELECT')]
+        self.assertEqual(changes, [
+            "ALTER TABLE returned_cars DETACH PARTITION returned_cars_default",
+            "CREATE TABLE returned_cars_y2024m03 PARTITION OF returned_cars FOR VALUES FROM",
+            "INSERT INTO returned_cars_y2024m03",
+            "DELETE FROM returned_cars_default WHERE returned_at >= '2024-03-01' AND returned_at < '2024-04-01'",
+            "ALTER TABLE returned_cars ATTACH PARTITION returned_cars_default DEFAULT",
+            "CREATE TABLE returned_cars_y2024m04 PARTITION OF returned_cars FOR VALUES FROM",
+        ])
+    
+    def test_partition_names(self):
+        self.assertEqual(archive.partition_name(datetime(2024, 3, 1)), "returned_cars_y2024m03")
+        self.assertEqual(archive._month_start(2024, 14), datetime(2025, 2, 1))
+
+class TestArchiveClosedLoans(unittest.TestCase):
+    """Archiving moves every closed loan, so it runs on a private database"""
+    
+    def setUp(self):
+        database = temporary_database()
+        database.__enter__()
+        self.addCleanup(database.__exit__, None, None, None)
+        self.db_manager = DatabaseManager()
+        self.addCleanup(self.db_manager.close)
+    
+    def test_closed_loans_are_archived(self):
+        """Returned loans move to the archive, open loans stay"""
+        self.assertTrue(self.db_manager.borrow_car("Archive Borrower", "Archive Car A"))
+        self.assertTrue(self.db_manager.borrow_car("Archive Borrower", "Archive Car B"))
+        self.assertTrue(self.db_manager.return_car("Archive Borrower", "Archive Car A"))
+        
+        self.assertEqual(self.db_manager.archive_closed_loans(batch_size=1), 1)
+        
+        session = self.db_manager.session
+        borrower = session.query(Borrower).filter_by(name="Archive Borrower").one()
+        self.assertEqual(session.query(BorrowedCar).filter_by(returned=True).count(), 0)
+        open_loans = session.query(BorrowedCar).filter_by(borrower_id=borrower.id).all()
+        self.assertEqual([loan.car.name for loan in open_loans], ["Archive Car B"])
+        archived = session.query(ArchivedBorrowedCar).filter_by(borrower_id=borrower.id).all()
+        self.assertEqual(len(archived), 1)
+        self.assertIsNotNone(archived[0].archived_at)
+        # The borrow and return paths still work after archival
+        self.assertTrue(self.db_manager.return_car("Archive Borrower", "Archive Car B"))
+        self.assertTrue(self.db_manager.borrow_car("Archive Borrower", "Archive Car A"))
+    
+    def test_cli_mentions_partitioning_only_when_asked(self):
+        runner = app_module.create_app({'TESTING': True}).test_cli_runner()
+        result = runner.invoke(args=['archive'])
+        self.assertEqual(result.exit_code, 0, result.output)
+        self.assertNotIn('Postgres only', result.output)
+        result = runner.invoke(args=['archive', '--partition'])
+        self.assertIn('Skipping returned_cars partitioning', result.output)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,85 @@
+"""
+Test script to verify the ASGI entry point serves the same pages as Flask
+"""
+import asyncio
+import importlib.util
+import unittest
+import app as app_module
+
+if not all(importlib.util.find_spec(name) for name in ('greenlet', 'aiosqlite')):
+    raise unittest.SkipTest("requires sqlalchemy[asyncio] and aiosqlite")
+
+import asgi
+
+def call(path, method='GET', query=b'', body=b'', headers=()):
+    """Send one HTTP request through the ASGI app, returning (status, headers, body)"""
+    messages = [{'type': 'http.request', 'body': body, 'more_body': False}]
+    sent = []
+    
+    async def receive():
+        return messages.pop(0) if messages else {'type': 'http.disconnect'}
+    
+    async def send(message):
+        sent.append(message)
+    
+    scope = {
+        'type': 'http', 'method': method, 'path': path, 'query_string': query,
+        'headers': [(name.encode(), value.encode()) for name, value in headers],
+        'server': ('localhost', 80), 'client': ('127.0.0.1', 5000), 'scheme': 'http',
+    }
+    asyncio.run(asgi.app(scope, receive, send))
+    start = sent[0]
+    body = b''.join(message.get('body', b'') for message in sent[1:])
+    return start['status'], dict((k.decode(), v.decode()) for k, v in start['headers']), body
+
+class TestAsgi(unittest.TestCase):
+    def setUp(self):
+        self.client = app_module.app.test_client()
+    
+    def test_environ_from_scope(self):
+        scope = {
+            'type': 'http', 'method': 'POST', 'path': '/borrow', 'query_string': b'a=1',
+            'headers': [(b'content-type', b'application/x-www-form-urlencoded'),
+                        (b'cookie', b'a=1'), (b'cookie', b'b=2')],
+        }
+        environ = asgi._environ(scope, b'name=x')
+        self.assertEqual(environ['REQUEST_METHOD'], 'POST')
+        self.assertEqual(environ['QUERY_STRING'], 'a=1')
+        self.assertEqual(environ['CONTENT_TYPE'], 'application/x-www-form-urlencoded')
+        self.assertEqual(environ['HTTP_COOKIE'], 'a=1; b=2')
+        self.assertEqual(environ['wsgi.input'].read(), b'name=x')
+    
+    def test_other_routes_fall_back_to_wsgi(self):
+        """Routes without an async view are served by Flask unchanged"""
+        status, headers, body = call('/login')
+        self.assertEqual(status, 200)
+        self.assertEqual(body, self.client.get('/login').data)
+        status, _, _ = call('/no-such-page')
+        self.assertEqual(status, 404)
+    
+    def test_oversized_body_rejected(self):
+        too_big = b'x' * (app_module.app.config['MAX_CONTENT_LENGTH'] + 1)
+        status, _, _ = call('/borrow', method='POST', body=too_big)
+        self.assertEqual(status, 413)
+    
+    def test_async_pages_match_flask(self):
+        for path in ('/', '/list', '/borrow', '/return', '/track', '/api/v1/cars', '/api/v1/history'):
+            with self.subTest(path=path):
+                status, _, body = call(path)
+                self.assertEqual(status, 200)
+                self.assertEqual(body, self.client.get(path).data)
+    
+    def test_async_bad_cursor(self):
+        status, _, _ = call('/track', query=b'returned_cursor=nonsense')
+        self.assertEqual(status, 400)
+        status, _, body = call('/api/v1/history', query=b'returned_cursor=nonsense')
+        self.assertEqual(status, 400)
+        self.assertEqual(body, self.client.get('/api/v1/history?returned_cursor=nonsense').data)
+    
+    def test_async_profile_requires_login(self):
+        status, headers, _ = call('/profile')
+        self.assertEqual(status, 302)
+        self.assertEqual(headers['location'], self.client.get('/profile').headers['Location'])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,75 @@
+"""
+Test script to verify fingerprinted static URLs and their caching headers
+"""
+import gzip
+import os
+import shutil
+import tempfile
+import unittest
+import app as app_module
+import assets
+
+class TestAssets(unittest.TestCase):
+    def setUp(self):
+        self.static = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.static)
+        with open(os.path.join(self.static, 'styles.css'), 'w') as f:
+            f.write('body { color: #fff; }\n' * 200)
+        self.app = app_module.create_app({'TESTING': True})
+        self.app.static_folder = self.static
+        self.client = self.app.test_client()
+
+    def _url(self, filename):
+        with self.app.test_request_context():
+            return assets.static_url(filename)
+
+    def test_url_changes_with_content(self):
+        url = self._url('styles.css')
+        self.assertRegex(url, r'^/assets/[0-9a-f]{12}/styles\.css$')
+        with open(os.path.join(self.static, 'styles.css'), 'a') as f:
+            f.write('a { color: red; }\n')
+        self.assertNotEqual(self._url('styles.css'), url)
+
+    def test_missing_file_uses_plain_static_url(self):
+        self.assertEqual(self._url('nope.css'), '/static/nope.css')
+
+    def test_fingerprinted_response_is_immutable(self):
+        url = self._url('styles.css')
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('immutable', response.headers['Cache-Control'])
+        self.assertIn(f'max-age={assets.ONE_YEAR}', response.headers['Cache-Control'])
+        etag = response.headers['ETag']
+        response.close()
+        revalidated = self.client.get(url, headers={'If-None-Match': etag})
+        self.assertEqual(revalidated.status_code, 304)
+
+    def test_stale_fingerprint_is_not_cached_forever(self):
+        response = self.client.get('/assets/000000000000/styles.css')
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('immutable', response.headers.get('Cache-Control', ''))
+        response.close()
+
+    def test_unknown_file_is_404(self):
+        self.assertEqual(self.client.get('/assets/000000000000/missing.css').status_code, 404)
+        self.assertEqual(self.client.get('/assets/000000000000/../app.py').status_code, 404)
+
+    def test_precompressed_copy_is_served(self):
+        _, written = assets.build(self.static)
+        self.assertGreaterEqual(written, 1)
+        url = self._url('styles.css')
+        response = self.client.get(url, headers={'Accept-Encoding': 'gzip'})
+        self.assertEqual(response.headers['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', response.headers['Vary'])
+        self.assertEqual(gzip.decompress(response.get_data()).decode(), 'body { color: #fff; }\n' * 200)
+        response.close()
+        plain = self.client.get(url, headers={'Accept-Encoding': 'identity'})
+        self.assertNotIn('Content-Encoding', plain.headers)
+        plain.close()
+
+    def test_pages_link_fingerprinted_stylesheet(self):
+        response = self.client.get('/login')
+        self.assertRegex(response.get_data(as_text=True), r'href="/assets/[0-9a-f]{12}/styles\.css"')
+
+if __name__ == '__main__':
+    unittest.main()
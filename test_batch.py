@@ -0,0 +1,89 @@
+"""
+Test script to verify batch borrow/return
+"""
+import os
+import tempfile
+import unittest
+from sqlalchemy import event
+import app as app_module
+from db_manager import DatabaseManager, get_engine
+from test_support import TestDataCleanup
+
+CAR_NAMES = ["Batch Car 1", "Batch Car 2", "Batch Car 3"]
+BORROWER = "Batch Borrower"
+
+class TestBatch(TestDataCleanup, unittest.TestCase):
+    test_borrowers = (BORROWER,)
+    test_cars = CAR_NAMES
+    
+    def setUp(self):
+        """Set up test cars"""
+        self.db_manager = DatabaseManager()
+        self._remove_test_data()
+        self.db_manager.ensure_cars(CAR_NAMES)
+        self.commits = 0
+        event.listen(get_engine(), 'commit', self._count_commit)
+    
+    def tearDown(self):
+        """Clean up test data"""
+        event.remove(get_engine(), 'commit', self._count_commit)
+        self._remove_test_data()
+        self.db_manager.close()
+    
+    def _count_commit(self, conn):
+        self.commits += 1
+    
+    def test_batch_is_one_commit_with_per_item_results(self):
+        """A batch commits once and reports each item"""
+        self.assertTrue(self.db_manager.borrow_car(BORROWER, CAR_NAMES[2]))
+        self.commits = 0
+        pairs = [(BORROWER, name) for name in CAR_NAMES]
+        results = self.db_manager.borrow_cars(pairs)
+        self.assertEqual([r['success'] for r in results], [True, True, False])
+        self.assertEqual(self.commits, 1)
+        
+        self.commits = 0
+        results = self.db_manager.return_cars(pairs + [(BORROWER, CAR_NAMES[0])])
+        self.assertEqual([r['success'] for r in results], [True, True, True, False])
+        self.assertEqual(self.commits, 1)
+        still_borrowed = [b for b in self.db_manager.get_borrowed_cars() if b.borrower.name == BORROWER]
+        self.assertEqual(still_borrowed, [])
+    
+    def test_batch_endpoint(self):
+        """The HTTP batch endpoint reports per-item results"""
+        client = app_module.app.test_client()
+        items = [{'borrower_name': BORROWER, 'car_name': name} for name in CAR_NAMES[:2]]
+        items.append({'borrower_name': BORROWER, 'car_name': CAR_NAMES[0]})
+        data = client.post('/api/v1/borrow/batch', json={'items': items}).get_json()
+        self.assertEqual(data['succeeded'], 2)
+        self.assertEqual(data['failed'], 1)
+        data = client.post('/api/v1/return/batch', json={'items': items[:2]}).get_json()
+        self.assertEqual(data['succeeded'], 2)
+        self.assertEqual(client.post('/api/v1/return/batch', json={'items': []}).status_code, 400)
+    
+    def test_cli_batch(self):
+        """The batch command reads a CSV and reports each car"""
+        runner = app_module.create_app({'TESTING': True}).test_cli_runner()
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'loans.csv')
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write("borrower_name,car_name\n")
+                f.writelines(f"{BORROWER}, {name}\n" for name in CAR_NAMES[:2])
+            result = runner.invoke(args=['batch', 'borrow', path])
+            self.assertEqual(result.exit_code, 0, result.output)
+            self.assertIn(f"{CAR_NAMES[0]} ({BORROWER}): ok", result.output)
+            self.assertIn('2 of 2 car(s) borrowed.', result.output)
+            result = runner.invoke(args=['batch', 'borrow', path])
+            self.assertIn(f"{CAR_NAMES[0]} ({BORROWER}): FAILED", result.output)
+            self.assertIn('0 of 2 car(s) borrowed.', result.output)
+            result = runner.invoke(args=['batch', 'return', path])
+            self.assertIn('2 of 2 car(s) returned.', result.output)
+            
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write("name,car\n")
+            result = runner.invoke(args=['batch', 'borrow', path])
+            self.assertNotEqual(result.exit_code, 0)
+            self.assertIn("needs 'borrower_name' and 'car_name' columns", result.output)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,55 @@
+"""
+Test script to verify borrow/return transactions are atomic
+"""
+import unittest
+from db_manager import DatabaseManager
+from test_support import TestDataCleanup
+
+CAR_NAME = "Atomic Test Car"
+BORROWERS = ["Atomic Borrower A", "Atomic Borrower B"]
+
+class TestBorrowReturn(TestDataCleanup, unittest.TestCase):
+    test_borrowers = BORROWERS
+    test_cars = (CAR_NAME,)
+    
+    def setUp(self):
+        """Set up a fresh available test car"""
+        self.db_manager = DatabaseManager()
+        self._remove_test_data()
+        self.db_manager.get_or_create_car(CAR_NAME)
+    
+    def tearDown(self):
+        """Clean up test data"""
+        self._remove_test_data()
+        self.db_manager.close()
+    
+    def test_second_borrow_fails(self):
+        """Only one borrower can claim an available car"""
+        self.assertTrue(self.db_manager.borrow_car(BORROWERS[0], CAR_NAME))
+        self.assertFalse(self.db_manager.borrow_car(BORROWERS[1], CAR_NAME))
+        self.assertEqual(len([b for b in self.db_manager.get_borrowed_cars() if b.car.name == CAR_NAME]), 1)
+    
+    def test_stale_session_cannot_borrow(self):
+        """A session that saw the car as available must not borrow it after another session did"""
+        other = DatabaseManager()
+        try:
+            car = other.get_or_create_car(CAR_NAME)
+            self.assertTrue(car.is_available)
+            self.assertTrue(self.db_manager.borrow_car(BORROWERS[0], CAR_NAME))
+            self.assertFalse(other.borrow_car(BORROWERS[1], CAR_NAME))
+        finally:
+            other.close()
+    
+    def test_return_closes_loan_once(self):
+        """Returning makes the car available again and cannot be repeated"""
+        self.assertTrue(self.db_manager.borrow_car(BORROWERS[0], CAR_NAME))
+        self.assertFalse(self.db_manager.return_car(BORROWERS[1], CAR_NAME))
+        self.assertTrue(self.db_manager.return_car(BORROWERS[0], CAR_NAME))
+        self.assertFalse(self.db_manager.return_car(BORROWERS[0], CAR_NAME))
+        self.assertTrue(self.db_manager.get_or_create_car(CAR_NAME).is_available)
+        returned = [r for r in self.db_manager.get_returned_cars() if r.car.name == CAR_NAME]
+        self.assertEqual(len(returned), 1)
+        self.assertIsNotNone(returned[0].borrowed_at)
+
+if __name__ == '__main__':
+    unittest.main()
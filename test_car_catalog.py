@@ -0,0 +1,58 @@
+"""
+Test script to verify bulk seeding of the car catalog
+"""
+import unittest
+from sqlalchemy import event
+from db_manager import DatabaseManager, get_engine
+from models import Car
+from Car import RentalCars
+from test_support import TestDataCleanup
+
+CAR_NAMES = ["Catalog Car 1", "Catalog Car 2", "Catalog Car 3"]
+
+class TestCarCatalog(TestDataCleanup, unittest.TestCase):
+    test_borrowers = ("Catalog Borrower",)
+    test_cars = CAR_NAMES
+    
+    def setUp(self):
+        """Set up database manager and statement recorder"""
+        self.db_manager = DatabaseManager()
+        self._remove_test_data()
+        self.statements = []
+        event.listen(get_engine(), 'before_cursor_execute', self._record)
+    
+    def tearDown(self):
+        """Clean up test data"""
+        event.remove(get_engine(), 'before_cursor_execute', self._record)
+        self._remove_test_data()
+        self.db_manager.close()
+    
+    def _record(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+    
+    def test_ensure_cars_is_idempotent(self):
+        """Seeding inserts only missing cars and keeps existing availability"""
+        self.assertEqual(self.db_manager.ensure_cars(CAR_NAMES[:2]), 2)
+        self.assertTrue(self.db_manager.borrow_car("Catalog Borrower", CAR_NAMES[0]))
+        self.assertEqual(self.db_manager.ensure_cars(CAR_NAMES), 1)
+        car = self.db_manager.session.query(Car).filter(Car.name == CAR_NAMES[0]).one()
+        self.assertFalse(car.is_available)
+    
+    def test_seeding_is_one_insert(self):
+        """Seeding the catalog issues a single INSERT, on first use"""
+        rental = RentalCars(CAR_NAMES)
+        self.assertEqual(self.statements, [])
+        rental.get_available_cars()
+        inserts = [s for s in self.statements if s.lstrip().upper().startswith('INSERT INTO CARS')]
+        self.assertEqual(len(inserts), 1)
+    
+    def test_available_cars_does_not_reseed(self):
+        """Listing the fleet is a single SELECT"""
+        rental = RentalCars(CAR_NAMES)
+        rental.get_available_cars()
+        self.statements.clear()
+        rental.get_available_cars()
+        self.assertEqual(len(self.statements), 1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,82 @@
+"""
+Test script to verify car images stored in the cars table and self-hosted
+"""
+import os
+import shutil
+import tempfile
+import unittest
+from sqlalchemy import Column, Integer, MetaData, Table, create_engine, inspect
+from db_manager import DatabaseManager, create_missing_columns
+from models import Car
+import app as app_module
+from test_support import TestDataCleanup
+
+CAR_NAMES = ["Image Car 1", "Image Car 2"]
+
+class TestCarImages(TestDataCleanup, unittest.TestCase):
+    test_cars = CAR_NAMES
+    
+    def setUp(self):
+        self.db_manager = DatabaseManager()
+        self._remove_test_data()
+        self.static = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.static)
+
+    def tearDown(self):
+        self._remove_test_data()
+        self.db_manager.close()
+
+    def _image(self, name):
+        self.db_manager.session.expire_all()
+        return self.db_manager.session.query(Car).filter(Car.name == name).one().image
+
+    def test_seeding_stores_images(self):
+        self.assertEqual(self.db_manager.ensure_cars({CAR_NAMES[0]: 'cars/one.jpg'}), 1)
+        self.assertEqual(self._image(CAR_NAMES[0]), 'cars/one.jpg')
+
+    def test_seeding_backfills_missing_images_only(self):
+        """Cars seeded by name get their image later; set images are kept"""
+        self.db_manager.ensure_cars(CAR_NAMES)
+        self.db_manager.set_car_image(CAR_NAMES[1], 'cars/custom.jpg')
+        inserted = self.db_manager.ensure_cars({CAR_NAMES[0]: 'cars/one.jpg', CAR_NAMES[1]: 'cars/two.jpg'})
+        self.assertEqual(inserted, 0)
+        self.assertEqual(self._image(CAR_NAMES[0]), 'cars/one.jpg')
+        self.assertEqual(self._image(CAR_NAMES[1]), 'cars/custom.jpg')
+
+    def test_car_images_command_self_hosts_image(self):
+        self.db_manager.ensure_cars({CAR_NAMES[0]: 'https://example.invalid/car.jpg'})
+        self.assertIn(CAR_NAMES[0], [car.name for car in self.db_manager.get_cars_with_remote_images()])
+        source = os.path.join(self.static, 'download.jpeg')
+        with open(source, 'wb') as f:
+            f.write(b'\xff\xd8\xff\xe0 jpeg bytes')
+        app = app_module.create_app({'TESTING': True})
+        app.static_folder = self.static
+        result = app.test_cli_runner().invoke(args=['car-images', '--set', f"{CAR_NAMES[0]}={source}"])
+        self.assertEqual(result.exit_code, 0, result.output)
+        self.assertEqual(self._image(CAR_NAMES[0]), f"cars/{CAR_NAMES[0]}.jpeg")
+        self.assertTrue(os.path.isfile(os.path.join(self.static, 'cars', f"{CAR_NAMES[0]}.jpeg")))
+        self.assertNotIn(CAR_NAMES[0], [car.name for car in self.db_manager.get_cars_with_remote_images()])
+
+    def test_non_image_is_rejected(self):
+        source = os.path.join(self.static, 'notes.txt')
+        with open(source, 'w') as f:
+            f.write('hello')
+        with self.assertRaises(ValueError):
+            app_module.images.import_image(source, os.path.join(self.static, 'cars'), 'Notes')
+
+class TestCreateMissingColumns(unittest.TestCase):
+    def test_adds_declared_nullable_columns(self):
+        """Databases created before cars.image existed get the column added"""
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        engine = create_engine(f"sqlite:///{os.path.join(directory, 'old.db')}")
+        old = MetaData()
+        Table('cars', old, Column('id', Integer, primary_key=True))
+        old.create_all(engine)
+        self.assertIn('cars.image', create_missing_columns(engine))
+        self.assertIn('image', {column['name'] for column in inspect(engine).get_columns('cars')})
+        self.assertEqual(create_missing_columns(engine), [])
+        engine.dispose()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -3,25 +3,79 @@
 Test script to verify database creation
 """
 
-from sqlalchemy import create_engine
-from models import Base
 import os
+import shutil
+import tempfile
+import unittest
+from sqlalchemy import Column, Integer, MetaData, Table, create_engine, inspect
+from db_manager import create_missing_indexes
+from models import Base
+
+# Indexes the borrow, return and history paths rely on
+HOT_PATH_INDEXES = {
+    'borrowers': {'ix_borrowers_name', 'ix_borrowers_user_id'},
+    'borrowed_cars': {'ix_borrowed_cars_borrower_car_returned', 'ix_borrowed_cars_returned', 'ix_borrowed_cars_open'},
+    'returned_cars': {'ix_returned_cars_borrower_id', 'ix_returned_cars_returned_at_id'},
+}
+
+def create_database():
+    print("Current working directory:", os.getcwd())
+
+    # Create SQLite database
+    print("Creating SQLite database...")
+    engine = create_engine('sqlite:///car_rental.db', echo=True)
+    print("Engine created:", engine)
+
+    # Create tables
+    print("Creating tables...")
+    Base.metadata.create_all(bind=engine)
+    print("Tables created successfully!")
+
+    # Check if file exists
+    if os.path.exists('car_rental.db'):
+        print("Database file created successfully!")
+        print("File size:", os.path.getsize('car_rental.db'), "bytes")
+    else:
+        print("Database file was not created!")
+
+class TestIndexes(unittest.TestCase):
+    def setUp(self):
+        """A private SQLite file per test"""
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        self.engine = create_engine(f"sqlite:///{os.path.join(directory, 'test.db')}")
+        self.addCleanup(self.engine.dispose)
+
+    def _index_names(self, table):
+        return {index['name'] for index in inspect(self.engine).get_indexes(table)}
+
+    def test_declared_indexes_exist(self):
+        Base.metadata.create_all(bind=self.engine)
+        for table, names in HOT_PATH_INDEXES.items():
+            self.assertLessEqual(names, self._index_names(table), table)
 
-print("Current working directory:", os.getcwd())
+    def test_adds_indexes_to_old_schema(self):
+        """Databases created before the indexes were declared get them added"""
+        old = MetaData()
+        for table in Base.metadata.sorted_tables:
+            table.to_metadata(old).indexes.clear()
+        old.create_all(self.engine)
+        for table in HOT_PATH_INDEXES:
+            self.assertEqual(self._index_names(table), set(), table)
 
-# Create SQLite database
-print("Creating SQLite database...")
-engine = create_engine('sqlite:///car_rental.db', echo=True)
-print("Engine created:", engine)
+        created = create_missing_indexes(self.engine)
+        for table, names in HOT_PATH_INDEXES.items():
+            self.assertLessEqual(names, set(created))
+            self.assertLessEqual(names, self._index_names(table), table)
+        self.assertEqual(create_missing_indexes(self.engine), [])
 
-# Create tables
-print("Creating tables...")
-Base.metadata.create_all(bind=engine)
-print("Tables created successfully!")
+    def test_indexes_skip_missing_tables(self):
+        """Index migration on a partial schema leaves tables it lacks alone"""
+        old = MetaData()
+        Table('cars', old, Column('id', Integer, primary_key=True))
+        old.create_all(self.engine)
+        create_missing_indexes(self.engine)
+        self.assertEqual(inspect(self.engine).get_table_names(), ['cars'])
 
-# Check if file exists
-if os.path.exists('car_rental.db'):
-    print("Database file created successfully!")
-    print("File size:", os.path.getsize('car_rental.db'), "bytes")
-else:
-    print("Database file was not created!")
\ No newline at end of file
+if __name__ == "__main__":
+    create_database()
@@ -0,0 +1,91 @@
+"""
+Test script to verify streaming export of rental history
+"""
+import csv
+import io
+import json
+import unittest
+from datetime import datetime, timedelta
+import app as app_module
+import export
+from db_manager import DatabaseManager
+from models import ReturnedCar
+from test_support import TestDataCleanup
+
+BORROWER = "Export Borrower"
+TOKEN = "export-test-token"
+
+class TestExport(TestDataCleanup, unittest.TestCase):
+    test_borrowers = (BORROWER,)
+    test_cars = ("Export Car",)
+    
+    def setUp(self):
+        """Create three returns on consecutive days"""
+        self.db_manager = DatabaseManager()
+        self._remove_test_data()
+        borrower = self.db_manager.add_borrower(BORROWER)
+        car = self.db_manager.get_or_create_car("Export Car")
+        self.base = datetime(2025, 5, 1, 9, 0)
+        for offset in range(3):
+            self.db_manager.session.add(ReturnedCar(
+                borrower_id=borrower.id, car_id=car.id,
+                borrowed_at=self.base, returned_at=self.base + timedelta(days=offset)
+            ))
+        self.db_manager.session.commit()
+        self.app = app_module.create_app({'TESTING': True, 'EXPORT_API_TOKEN': TOKEN})
+        self.client = self.app.test_client()
+    
+    def tearDown(self):
+        """Clean up test data"""
+        self._remove_test_data()
+        self.db_manager.close()
+    
+    def _ours(self, rows):
+        return [row for row in rows if row['borrower_name'] == BORROWER]
+    
+    def test_csv_export_in_small_chunks(self):
+        """Chunked output is one CSV with a single header row"""
+        text = ''.join(export.export_history('returned', 'csv', chunk_size=1))
+        rows = list(csv.DictReader(io.StringIO(text)))
+        self.assertEqual(text.count('borrower_name'), 1)
+        ours = self._ours(rows)
+        self.assertEqual(len(ours), 3)
+        self.assertEqual(ours[0]['car_name'], "Export Car")
+        self.assertEqual(ours[0]['returned_at'], self.base.isoformat())
+    
+    def test_ndjson_export_with_date_range(self):
+        chunks = export.export_history('returned', 'ndjson', since=self.base + timedelta(days=1),
+                                       until=self.base + timedelta(days=2))
+        rows = [json.loads(line) for line in ''.join(chunks).splitlines()]
+        ours = self._ours(rows)
+        self.assertEqual([row['returned_at'] for row in ours], [(self.base + timedelta(days=1)).isoformat()])
+    
+    def test_endpoint_requires_token(self):
+        self.assertEqual(self.client.get('/api/v1/export/returned').status_code, 401)
+        response = self.client.get('/api/v1/export/returned', headers={'Authorization': 'Bearer wrong'})
+        self.assertEqual(response.status_code, 401)
+        disabled = app_module.create_app({'TESTING': True, 'EXPORT_API_TOKEN': None}).test_client()
+        self.assertEqual(disabled.get('/api/v1/export/returned').status_code, 404)
+    
+    def test_endpoint_streams_export(self):
+        headers = {'Authorization': f'Bearer {TOKEN}'}
+        response = self.client.get('/api/v1/export/returned?format=ndjson&since=2025-05-02', headers=headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.mimetype, 'application/x-ndjson')
+        rows = self._ours([json.loads(line) for line in response.get_data(as_text=True).splitlines()])
+        self.assertEqual(len(rows), 2)
+        
+        self.assertEqual(self.client.get('/api/v1/export/returned?since=yesterday', headers=headers).status_code, 400)
+        self.assertEqual(self.client.get('/api/v1/export/returned?format=xml', headers=headers).status_code, 400)
+        self.assertEqual(self.client.get('/api/v1/export/users', headers=headers).status_code, 404)
+    
+    def test_cli_export(self):
+        runner = self.app.test_cli_runner()
+        result = runner.invoke(args=['export', 'donated', '--format', 'csv'])
+        self.assertEqual(result.exit_code, 0, result.output)
+        self.assertTrue(result.output.startswith('id,donor_name,car_name,donated_at'))
+        result = runner.invoke(args=['export', 'returned', '--since', 'soon'])
+        self.assertNotEqual(result.exit_code, 0)
+
+if __name__ == "__main__":
+    unittest.main()
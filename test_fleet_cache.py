@@ -0,0 +1,71 @@
+"""
+Test script to verify the in-process fleet availability cache
+"""
+import unittest
+from sqlalchemy import event
+from db_manager import DatabaseManager, get_engine
+from Car import RentalCars
+from test_support import TestDataCleanup
+
+CAR_NAME = "Cache Test Car"
+BORROWER = "Cache Borrower"
+
+class TestFleetCache(TestDataCleanup, unittest.TestCase):
+    test_borrowers = (BORROWER,)
+    test_cars = (CAR_NAME,)
+    
+    def setUp(self):
+        """Set up a rental system with one test car"""
+        self.db_manager = DatabaseManager()
+        self._remove_test_data()
+        self.rental = RentalCars([CAR_NAME])
+        self.statements = []
+        event.listen(get_engine(), 'before_cursor_execute', self._record)
+    
+    def tearDown(self):
+        """Clean up test data"""
+        event.remove(get_engine(), 'before_cursor_execute', self._record)
+        self._remove_test_data()
+        self.db_manager.close()
+    
+    def _record(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+    
+    def test_repeat_reads_skip_database(self):
+        """A fresh snapshot is served without issuing queries"""
+        self.assertIn(CAR_NAME, self.rental.get_available_car_names())
+        self.statements.clear()
+        self.assertIn(CAR_NAME, self.rental.get_available_car_names())
+        self.assertEqual(self.statements, [])
+    
+    def test_local_writes_invalidate(self):
+        """Borrow and return through RentalCars are visible immediately"""
+        self.rental.get_available_car_names()
+        self.assertTrue(self.rental.borrowCars(BORROWER, CAR_NAME))
+        self.assertNotIn(CAR_NAME, self.rental.get_available_car_names())
+        self.assertTrue(self.rental.returnCars(BORROWER, CAR_NAME))
+        self.assertIn(CAR_NAME, self.rental.get_available_car_names())
+    
+    def test_other_worker_writes_seen_after_ttl(self):
+        """Writes from another process are picked up via the fleet version"""
+        self.rental.get_available_car_names()
+        self.assertTrue(self.db_manager.borrow_car(BORROWER, CAR_NAME))
+        # Simulate the snapshot TTL elapsing
+        self.rental._fleet_checked_at = 0.0
+        self.assertNotIn(CAR_NAME, self.rental.get_available_car_names())
+    
+    def test_fleet_version_counts_changes(self):
+        """Every borrow and return bumps the fleet version once"""
+        version = self.db_manager.get_fleet_version()
+        self.assertTrue(self.db_manager.borrow_car(BORROWER, CAR_NAME))
+        self.assertTrue(self.db_manager.return_car(BORROWER, CAR_NAME))
+        self.assertEqual(self.db_manager.get_fleet_version(), version + 2)
+    
+    def test_readers_do_not_wait_for_a_reload(self):
+        """A fresh snapshot is served while another thread reloads"""
+        self.rental.get_available_car_names()
+        with self.rental._refresh_lock:
+            self.assertIn(CAR_NAME, self.rental.get_available_car_names())
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,69 @@
+"""
+Test script to verify cached car card fragments
+"""
+import unittest
+from flask import template_rendered
+from Car import CarCard
+import app as app_module
+import fragments
+
+class TestCarCardFragments(unittest.TestCase):
+    def setUp(self):
+        self.app = app_module.create_app({'TESTING': True})
+        fragments.car_cards.clear()
+        self.rendered = []
+        template_rendered.connect(self._record, self.app)
+        self.addCleanup(template_rendered.disconnect, self._record, self.app)
+
+    def _record(self, sender, template, context, **extra):
+        if template.name == 'car_card.html':
+            self.rendered.append(context['car'].name)
+
+    def test_card_is_rendered_once_per_state(self):
+        with self.app.test_request_context():
+            first = fragments.car_card(CarCard('Fragment Car A', None), 'row')
+            self.assertEqual(fragments.car_card(CarCard('Fragment Car A', None), 'row'), first)
+            self.assertEqual(self.rendered, ['Fragment Car A'])
+            fragments.car_card(CarCard('Fragment Car B', None), 'row')
+            self.assertEqual(self.rendered, ['Fragment Car A', 'Fragment Car B'])
+
+    def test_availability_change_rerenders_only_that_car(self):
+        with self.app.test_request_context():
+            fragments.car_card(CarCard('Fragment Car A', None), 'row')
+            fragments.car_card(CarCard('Fragment Car B', None), 'row')
+            del self.rendered[:]
+            on_road = fragments.car_card(CarCard('Fragment Car A', None, False), 'row')
+            fragments.car_card(CarCard('Fragment Car B', None), 'row')
+        self.assertEqual(self.rendered, ['Fragment Car A'])
+        self.assertIn('On road', on_road)
+        self.assertNotIn('Borrow', on_road)
+
+    def test_missing_car_uses_default_image(self):
+        with self.app.test_request_context():
+            html = fragments.car_card(None, 'thumb', 'Donated Car')
+        self.assertIn('alt="Donated Car image"', html)
+        self.assertIn('cars/image.png', html)
+
+    def test_unknown_layout_is_rejected(self):
+        with self.app.test_request_context():
+            with self.assertRaises(ValueError):
+                fragments.car_card(CarCard('Fragment Car A', None), 'poster')
+
+    def test_repeat_page_render_reuses_cards(self):
+        client = self.app.test_client()
+        self.assertEqual(client.get('/list').status_code, 200)
+        self.assertTrue(self.rendered)
+        del self.rendered[:]
+        self.assertEqual(client.get('/list').status_code, 200)
+        self.assertEqual(self.rendered, [])
+
+    def test_cache_is_bounded(self):
+        cache = fragments.FragmentCache(2)
+        for key in ('a', 'b', 'a', 'c'):
+            cache.get_or_render(key, lambda: key)
+        self.assertEqual(len(cache), 2)
+        self.assertEqual(cache.get_or_render('a', lambda: 'rendered again'), 'a')
+        self.assertEqual(cache.get_or_render('b', lambda: 'rendered again'), 'rendered again')
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,81 @@
+"""
+Test script to verify resized image variants and how templates pick them
+"""
+import os
+import shutil
+import tempfile
+import unittest
+import images
+
+class TestVariantPaths(unittest.TestCase):
+    def setUp(self):
+        self.static = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.static)
+
+    def test_variant_path(self):
+        self.assertEqual(images.variant_path('cars/AMG GLS.jpeg', 'thumb', 'webp'), 'cars/variants/AMG GLS-thumb.webp')
+        self.assertEqual(images.variant_path('uploads/me_1.png', 'card'), 'uploads/variants/me_1-card.jpg')
+
+    def test_missing_variant_is_none(self):
+        """Templates fall back to the original until variants are generated"""
+        self.assertIsNone(images.image_variant(self.static, 'cars/none.jpg', 'thumb'))
+        self.assertIsNone(images.image_variant(self.static, None, 'thumb'))
+        self.assertIsNone(images.image_variant(self.static, 'https://example.com/car.jpg', 'thumb'))
+
+    def test_existing_variant_is_used(self):
+        os.makedirs(os.path.join(self.static, 'cars', 'variants'))
+        open(os.path.join(self.static, 'cars', 'variants', 'present-card.webp'), 'wb').close()
+        self.assertEqual(images.image_variant(self.static, 'cars/present.jpg', 'card', 'webp'),
+                         'cars/variants/present-card.webp')
+
+@unittest.skipUnless(images.PILLOW_AVAILABLE, 'Pillow is not installed')
+class TestGenerateVariants(unittest.TestCase):
+    def setUp(self):
+        from PIL import Image
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.source = os.path.join(self.directory, 'car.png')
+        Image.new('RGBA', (3000, 1500), (200, 30, 30, 128)).save(self.source)
+
+    def test_writes_every_size_and_format(self):
+        from PIL import Image
+        written = images.generate_variants(self.source)
+        self.assertEqual(len(written), len(images.VARIANTS) * len(images.FORMATS))
+        for variant, (width, height) in images.VARIANTS.items():
+            for fmt in images.FORMATS:
+                path = os.path.join(self.directory, images.variant_path('car.png', variant, fmt))
+                with Image.open(path) as image:
+                    self.assertLessEqual(image.width, width)
+                    self.assertLessEqual(image.height, height)
+                    # Aspect ratio is kept
+                    self.assertEqual(image.width, image.height * 2)
+
+    def test_up_to_date_variants_are_skipped(self):
+        images.generate_variants(self.source)
+        self.assertEqual(images.generate_variants(self.source), [])
+        self.assertEqual(len(images.generate_variants(self.source, force=True)),
+                         len(images.VARIANTS) * len(images.FORMATS))
+
+    def test_remove_variants(self):
+        """Only the image's own variants go; a shared variants/ stays while in use"""
+        other = os.path.join(self.directory, 'other.png')
+        shutil.copy(self.source, other)
+        images.generate_variants(self.source)
+        images.generate_variants(other)
+        images.remove_variants(self.source)
+        remaining = os.listdir(os.path.join(self.directory, 'variants'))
+        self.assertEqual(len(remaining), len(images.VARIANTS) * len(images.FORMATS))
+        self.assertTrue(all(name.startswith('other-') for name in remaining))
+        images.remove_variants(other)
+        self.assertFalse(os.path.exists(os.path.join(self.directory, 'variants')))
+
+    def test_unreadable_image_raises(self):
+        broken = os.path.join(self.directory, 'broken.jpg')
+        with open(broken, 'wb') as f:
+            f.write(b'not an image')
+        with self.assertRaises(ValueError):
+            images.generate_variants(broken)
+        self.assertFalse(os.path.exists(os.path.join(self.directory, 'variants')))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,105 @@
+"""
+Test script to verify bulk import of cars, borrowers and rentals
+"""
+import json
+import os
+import tempfile
+import unittest
+import app as app_module
+import importer
+from db_manager import DatabaseManager
+from models import Borrower, Car, BorrowedCar, ReturnedCar, ImportProgress
+from test_support import TestDataCleanup
+
+CARS = ["Import Car A", "Import Car B", "Import Car C"]
+BORROWERS = ["Import Borrower 1", "Import Borrower 2"]
+
+class TestImport(TestDataCleanup, unittest.TestCase):
+    test_borrowers = BORROWERS
+    test_cars = CARS
+    
+    def setUp(self):
+        self.db_manager = DatabaseManager()
+        self._remove_test_data()
+        self.tmpdir = tempfile.TemporaryDirectory()
+    
+    def tearDown(self):
+        """Clean up test data"""
+        self._remove_test_data()
+        self.db_manager.close()
+        self.tmpdir.cleanup()
+    
+    def _remove_test_data(self):
+        super()._remove_test_data()
+        session = self.db_manager.session
+        session.query(ImportProgress).filter(ImportProgress.source.like('test:%')).delete(synchronize_session=False)
+        session.commit()
+    
+    def _write(self, name, content):
+        path = os.path.join(self.tmpdir.name, name)
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(content)
+        return path
+    
+    def test_import_cars_skips_existing(self):
+        self.db_manager.get_or_create_car(CARS[0])
+        path = self._write('cars.csv', "name,is_available\n%s,true\n%s,false\n%s,\n" % tuple(CARS))
+        imported, skipped = importer.import_records('cars', importer.read_records(path), 'test:cars', chunk_size=2)
+        self.assertEqual((imported, skipped), (3, 0))
+        
+        session = self.db_manager.session
+        session.expire_all()
+        cars = {car.name: car.is_available for car in session.query(Car).filter(Car.name.in_(CARS))}
+        self.assertEqual(cars, {CARS[0]: True, CARS[1]: False, CARS[2]: True})
+    
+    def test_import_rentals(self):
+        """Returned rentals go to history, open ones become loans"""
+        records = [
+            {'borrower_name': BORROWERS[0], 'car_name': CARS[0],
+             'borrowed_at': '2024-02-01T10:00:00', 'returned_at': '2024-02-03T10:00:00'},
+            {'borrower_name': BORROWERS[1], 'car_name': CARS[1], 'borrowed_at': '2024-03-01T10:00:00'},
+        ]
+        path = self._write('rentals.ndjson', '\n'.join(json.dumps(record) for record in records) + '\n')
+        imported, _ = importer.import_records('rentals', importer.read_records(path), 'test:rentals')
+        self.assertEqual(imported, 2)
+        
+        session = self.db_manager.session
+        session.expire_all()
+        returned = session.query(ReturnedCar).join(Borrower).filter(Borrower.name == BORROWERS[0]).one()
+        self.assertEqual(returned.car.name, CARS[0])
+        self.assertEqual(returned.returned_at.day, 3)
+        loan = session.query(BorrowedCar).join(Borrower).filter(Borrower.name == BORROWERS[1]).one()
+        self.assertFalse(loan.returned)
+        self.assertFalse(session.query(Car).filter_by(name=CARS[1]).one().is_available)
+        # The imported open loan can be returned normally
+        self.assertTrue(self.db_manager.return_car(BORROWERS[1], CARS[1]))
+    
+    def test_interrupted_import_resumes(self):
+        """Committed chunks are skipped when an import is re-run"""
+        good = "name\n%s\n%s\n" % (BORROWERS[0], BORROWERS[1])
+        path = self._write('borrowers.csv', good + "\n")
+        records = list(importer.read_records(path)) + [{'name': ''}]
+        with self.assertRaises(ValueError):
+            importer.import_records('borrowers', records, 'test:borrowers', chunk_size=2)
+        session = self.db_manager.session
+        self.assertEqual(session.get(ImportProgress, 'test:borrowers').records_done, 2)
+        
+        imported, skipped = importer.import_records('borrowers', importer.read_records(path), 'test:borrowers')
+        self.assertEqual((imported, skipped), (0, 2))
+        self.assertEqual(session.query(Borrower).filter(Borrower.name.in_(BORROWERS)).count(), 2)
+    
+    def test_cli_import(self):
+        path = self._write('cars.csv', "name\n%s\n" % CARS[2])
+        runner = app_module.create_app({'TESTING': True}).test_cli_runner()
+        result = runner.invoke(args=['import', 'cars', path])
+        self.assertEqual(result.exit_code, 0, result.output)
+        self.assertIn('Imported 1 cars record(s).', result.output)
+        result = runner.invoke(args=['import', 'cars', path])
+        self.assertIn('Skipped 1 record(s)', result.output)
+        
+        session = self.db_manager.session
+        session.query(ImportProgress).filter(ImportProgress.source == importer.source_key('cars', path)).delete()
+        session.commit()
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,149 @@
+"""
+Test script to verify the background job queue and profile image processing
+"""
+import io
+import os
+import shutil
+import tempfile
+import unittest
+from db_manager import DatabaseManager
+from models import Job
+import app as app_module
+import jobs
+from test_support import TestDataCleanup
+
+_calls = []
+
+@jobs.job('test_flaky')
+def _flaky(fail_with=None):
+    _calls.append(fail_with)
+    if fail_with == 'value':
+        raise ValueError('bad input')
+    if fail_with == 'runtime':
+        raise RuntimeError('temporary failure')
+
+class TestJobs(unittest.TestCase):
+    def setUp(self):
+        # Run jobs inline so their effects are visible when enqueue returns
+        self._workers = jobs.WORKERS
+        self._retry_delay = jobs.RETRY_DELAY
+        jobs.WORKERS = 0
+        jobs.RETRY_DELAY = 0
+        self.job_ids = []
+        del _calls[:]
+
+    def tearDown(self):
+        jobs.WORKERS = self._workers
+        jobs.RETRY_DELAY = self._retry_delay
+        self._remove_test_data()
+
+    def _remove_test_data(self):
+        db_manager = DatabaseManager()
+        try:
+            db_manager.session.query(Job).filter(Job.id.in_(self.job_ids)).delete(synchronize_session=False)
+            db_manager.session.commit()
+        finally:
+            db_manager.close()
+
+    def _job(self, job_id):
+        self.job_ids.append(job_id)
+        db_manager = DatabaseManager()
+        try:
+            return db_manager.session.get(Job, job_id)
+        finally:
+            db_manager.close()
+
+    def test_successful_job_is_done(self):
+        job = self._job(jobs.enqueue('test_flaky'))
+        self.assertEqual((job.status, job.attempts), ('done', 1))
+        self.assertEqual(_calls, [None])
+
+    def test_transient_failure_is_retried(self):
+        job = self._job(jobs.enqueue('test_flaky', fail_with='runtime'))
+        self.assertEqual((job.status, job.attempts), ('failed', jobs.MAX_ATTEMPTS))
+        self.assertEqual(job.error, 'temporary failure')
+
+    def test_retry_waits_for_its_delay(self):
+        """A failed job stays pending until its retry is due"""
+        jobs.RETRY_DELAY = 60
+        self.addCleanup(jobs.shutdown)
+        with self.assertLogs('jobs', 'ERROR'):
+            job = self._job(jobs.enqueue('test_flaky', fail_with='runtime'))
+        self.assertEqual((job.status, job.attempts), ('pending', 1))
+        self.assertEqual(len(jobs._retry_timers), 1)
+
+    def test_bad_input_is_not_retried(self):
+        job = self._job(jobs.enqueue('test_flaky', fail_with='value'))
+        self.assertEqual((job.status, job.attempts), ('failed', 1))
+
+    def test_job_runs_once(self):
+        job_id = jobs.enqueue('test_flaky')
+        self._job(job_id)
+        self.assertFalse(jobs.run_job(job_id))
+        self.assertEqual(len(_calls), 1)
+
+    def test_unknown_kind_is_rejected(self):
+        with self.assertRaises(ValueError):
+            jobs.enqueue('no_such_kind')
+
+class TestProfileImageUpload(TestDataCleanup, unittest.TestCase):
+    email = 'upload_job_test@example.com'
+    test_emails = (email,)
+
+    def setUp(self):
+        self._workers = jobs.WORKERS
+        jobs.WORKERS = 0
+        self.uploads = tempfile.mkdtemp()
+        self.incoming = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.uploads)
+        self.addCleanup(shutil.rmtree, self.incoming)
+        self.app = app_module.create_app({
+            'TESTING': True, 'UPLOAD_FOLDER': self.uploads, 'UPLOAD_INCOMING_FOLDER': self.incoming,
+        })
+        self.client = self.app.test_client()
+        self._remove_test_data()
+
+    def tearDown(self):
+        jobs.WORKERS = self._workers
+        self._remove_test_data()
+
+    def _image(self):
+        if jobs.images.PILLOW_AVAILABLE:
+            from PIL import Image
+            buffer = io.BytesIO()
+            Image.new('RGB', (400, 300), (10, 20, 30)).save(buffer, 'JPEG')
+            return buffer.getvalue()
+        return b'\xff\xd8\xff\xe0 not decoded without Pillow'
+
+    def _register(self, data):
+        return self.client.post('/register', data={
+            'name': 'Upload Job Test', 'email': self.email,
+            'profile_image': (io.BytesIO(data), 'My Photo.JPG'),
+        }, content_type='multipart/form-data')
+
+    def test_upload_is_processed_into_place(self):
+        response = self._register(self._image())
+        self.assertEqual(response.status_code, 302)
+        db_manager = DatabaseManager()
+        try:
+            user = db_manager.get_user_by_email(self.email)
+        finally:
+            db_manager.close()
+        self.assertRegex(user.profile_image, r'^uploads/[0-9a-f]{20}\.jpg$')
+        self.assertTrue(os.path.exists(os.path.join(self.uploads, os.path.basename(user.profile_image))))
+        # The raw upload does not linger
+        self.assertEqual(os.listdir(self.incoming), [])
+
+    @unittest.skipUnless(jobs.images.PILLOW_AVAILABLE, 'Pillow is not installed')
+    def test_unreadable_upload_is_dropped(self):
+        self.assertEqual(self._register(b'not an image').status_code, 302)
+        db_manager = DatabaseManager()
+        try:
+            user = db_manager.get_user_by_email(self.email)
+        finally:
+            db_manager.close()
+        self.assertIsNone(user.profile_image)
+        self.assertEqual(os.listdir(self.uploads), [])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,106 @@
+"""
+Test script to verify the set-based purge operations
+"""
+import unittest
+from datetime import datetime, timedelta
+import app as app_module
+import maintenance
+from db_manager import DatabaseManager
+from models import User, Borrower, Car, BorrowedCar, ReturnedCar, DonatedCar
+from test_support import TestDataCleanup
+
+BORROWERS = ["Purge Borrower 1", "Purge Borrower 2"]
+CARS = ["Purge Car A", "Purge Car B", "Purge Car C"]
+EMAIL = "purge@example.com"
+
+class TestMaintenance(TestDataCleanup, unittest.TestCase):
+    test_borrowers = BORROWERS
+    test_cars = CARS
+    test_emails = (EMAIL,)
+    
+    def setUp(self):
+        """Borrower 1 has an open loan and three returns; borrower 2 belongs to a user"""
+        self.db_manager = DatabaseManager()
+        self._remove_test_data()
+        self.user = self.db_manager.create_user(name="Purge User", email=EMAIL)
+        self.db_manager.add_borrower(BORROWERS[1], user_id=self.user.id)
+        for _ in range(3):
+            self.assertTrue(self.db_manager.borrow_car(BORROWERS[0], CARS[0]))
+            self.assertTrue(self.db_manager.return_car(BORROWERS[0], CARS[0]))
+        self.assertTrue(self.db_manager.borrow_car(BORROWERS[0], CARS[1]))
+        self.assertTrue(self.db_manager.borrow_car(BORROWERS[1], CARS[2]))
+    
+    def tearDown(self):
+        """Clean up test data"""
+        self._remove_test_data()
+        self.db_manager.close()
+    
+    def test_dry_run_counts_without_deleting(self):
+        counts = maintenance.purge_borrowers([BORROWERS[0]], dry_run=True)
+        self.assertEqual(counts['borrowed_cars'], 4)
+        self.assertEqual(counts['returned_cars'], 3)
+        self.assertEqual(counts['borrowers'], 1)
+        self.assertEqual(self.db_manager.session.query(Borrower).filter_by(name=BORROWERS[0]).count(), 1)
+    
+    def test_purge_borrowers_in_batches(self):
+        """Small batches delete everything and free the borrowed car"""
+        counts = maintenance.purge_borrowers([BORROWERS[0]], batch_size=2)
+        self.assertEqual(counts, {'borrowed_cars': 4, 'borrowed_cars_archive': 0, 'returned_cars': 3, 'borrowers': 1})
+        
+        session = self.db_manager.session
+        session.expire_all()
+        self.assertEqual(session.query(Borrower).filter_by(name=BORROWERS[0]).count(), 0)
+        self.assertTrue(session.query(Car).filter_by(name=CARS[1]).one().is_available)
+        # Other borrowers are untouched
+        self.assertEqual(session.query(BorrowedCar).join(Borrower).filter(Borrower.name == BORROWERS[1]).count(), 1)
+    
+    def test_purge_user(self):
+        user_id = self.user.id
+        counts = maintenance.purge_user(user_id)
+        self.assertEqual(counts['users'], 1)
+        self.assertEqual(counts['user_rental_summaries'], 1)
+        session = self.db_manager.session
+        session.expire_all()
+        self.assertIsNone(session.get(User, user_id))
+        self.assertEqual(session.query(Borrower).filter_by(name=BORROWERS[1]).count(), 0)
+        self.assertTrue(session.query(Car).filter_by(name=CARS[2]).one().is_available)
+    
+    def test_purge_cars(self):
+        """Cars go with their loans and returns; borrowers stay"""
+        version = self.db_manager.get_fleet_version()
+        counts = maintenance.purge_cars(CARS[:2])
+        self.assertEqual((counts['cars'], counts['borrowed_cars'], counts['returned_cars']), (2, 4, 3))
+        session = self.db_manager.session
+        session.expire_all()
+        self.assertEqual(session.query(Car).filter(Car.name.in_(CARS)).count(), 1)
+        self.assertEqual(session.query(Borrower).filter_by(name=BORROWERS[0]).count(), 1)
+        self.assertGreater(self.db_manager.get_fleet_version(), version)
+    
+    def test_purge_older_than(self):
+        """Only closed history before the cutoff goes"""
+        session = self.db_manager.session
+        old = datetime.now() - timedelta(days=400)
+        returned_ids = [r.id for r in session.query(ReturnedCar).join(Borrower).filter(Borrower.name == BORROWERS[0])]
+        session.query(ReturnedCar).filter(ReturnedCar.id == returned_ids[0]).update({'returned_at': old})
+        session.add(DonatedCar(donor_name="Purge Donor", car_name=CARS[0], donated_at=old))
+        session.commit()
+        
+        cutoff = datetime.now() - timedelta(days=365)
+        self.assertEqual(maintenance.purge_older_than(cutoff, dry_run=True)['returned_cars'], 1)
+        counts = maintenance.purge_older_than(cutoff)
+        self.assertEqual(counts['returned_cars'], 1)
+        self.assertGreaterEqual(counts['donated_cars'], 1)
+        session.expire_all()
+        self.assertEqual(session.query(ReturnedCar).filter(ReturnedCar.id.in_(returned_ids)).count(), 2)
+        self.assertEqual(session.query(BorrowedCar).filter_by(returned=False).join(Borrower)
+                         .filter(Borrower.name.in_(BORROWERS)).count(), 2)
+    
+    def test_cli_purge_requires_one_target(self):
+        runner = app_module.create_app({'TESTING': True}).test_cli_runner()
+        self.assertNotEqual(runner.invoke(args=['purge']).exit_code, 0)
+        result = runner.invoke(args=['purge', '--borrower', BORROWERS[0], '--dry-run'])
+        self.assertEqual(result.exit_code, 0, result.output)
+        self.assertIn('Would delete 8 row(s).', result.output)
+
+if __name__ == "__main__":
+    unittest.main()
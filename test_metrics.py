@@ -0,0 +1,40 @@
+"""
+Test script to verify per-request SQL and latency instrumentation
+"""
+import unittest
+import app as app_module
+import metrics
+
+class TestMetrics(unittest.TestCase):
+    def setUp(self):
+        """Set up an app with metrics enabled"""
+        metrics.registry.reset()
+        self.app = app_module.create_app({'METRICS_ENABLED': True})
+        self.client = self.app.test_client()
+    
+    def test_server_timing_header(self):
+        """Responses report database and total time"""
+        response = self.client.get('/track')
+        self.assertEqual(response.status_code, 200)
+        timing = response.headers['Server-Timing']
+        self.assertIn('db;dur=', timing)
+        self.assertIn('total;dur=', timing)
+    
+    def test_prometheus_endpoint(self):
+        """Per-endpoint query counts are exposed in Prometheus format"""
+        self.client.get('/track')
+        body = self.client.get('/metrics').get_data(as_text=True)
+        self.assertIn('# TYPE lcs_db_queries_total counter', body)
+        self.assertIn('lcs_requests_total{endpoint="main.track_cars"} 1', body)
+        stats = metrics.registry.snapshot()['main.track_cars']
+        self.assertGreater(stats['queries'], 0)
+        self.assertIsNotNone(stats['slowest_statement'])
+    
+    def test_disabled_by_default(self):
+        """Without the opt-in there is no /metrics endpoint or header"""
+        client = app_module.create_app().test_client()
+        self.assertEqual(client.get('/metrics').status_code, 404)
+        self.assertNotIn('Server-Timing', client.get('/track').headers)
+
+if __name__ == '__main__':
+    unittest.main()
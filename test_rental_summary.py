@@ -0,0 +1,82 @@
+"""
+Test script to verify the maintained per-user rental summary
+"""
+import unittest
+from datetime import datetime, timedelta
+import app as app_module
+from db_manager import DatabaseManager
+from models import Borrower, ReturnedCar
+from test_support import TestDataCleanup
+
+BORROWER = "Summary Borrower"
+CARS = ["Summary Car A", "Summary Car B"]
+
+class TestRentalSummary(TestDataCleanup, unittest.TestCase):
+    test_borrowers = (BORROWER,)
+    test_cars = CARS
+    test_emails = ("summary@example.com",)
+    
+    def setUp(self):
+        self.db_manager = DatabaseManager()
+        self._remove_test_data()
+        self.user = self.db_manager.create_user(name="Summary User", email="summary@example.com")
+        self.db_manager.add_borrower(BORROWER, user_id=self.user.id)
+    
+    def tearDown(self):
+        """Clean up test data"""
+        self._remove_test_data()
+        self.db_manager.close()
+    
+    def _summary(self):
+        self.db_manager.session.expire_all()
+        return self.db_manager.get_rental_summary(self.user.id)
+    
+    def test_new_user_has_empty_summary(self):
+        summary = self._summary()
+        self.assertEqual((summary.rentals_count, summary.active_loans, summary.total_days_rented), (0, 0, 0.0))
+        self.assertIsNone(summary.last_rental_at)
+    
+    def test_borrow_and_return_update_summary(self):
+        """Borrow and return keep the summary current, batches included"""
+        self.assertTrue(self.db_manager.borrow_car(BORROWER, CARS[0]))
+        self.db_manager.borrow_cars([(BORROWER, CARS[1])])
+        summary = self._summary()
+        self.assertEqual((summary.rentals_count, summary.active_loans), (2, 2))
+        self.assertIsNotNone(summary.last_rental_at)
+        
+        self.assertTrue(self.db_manager.return_car(BORROWER, CARS[0]))
+        self.assertFalse(self.db_manager.return_car(BORROWER, CARS[0]))
+        summary = self._summary()
+        self.assertEqual((summary.rentals_count, summary.active_loans), (2, 1))
+        self.assertGreaterEqual(summary.total_days_rented, 0.0)
+    
+    def test_rebuild_matches_history(self):
+        """Rebuilding recomputes totals from returned and open loans"""
+        borrower = self.db_manager.session.query(Borrower).filter_by(name=BORROWER).one()
+        car = self.db_manager.get_or_create_car(CARS[0])
+        borrowed_at = datetime(2025, 3, 1, 12, 0)
+        self.db_manager.session.add(ReturnedCar(
+            borrower_id=borrower.id, car_id=car.id,
+            borrowed_at=borrowed_at, returned_at=borrowed_at + timedelta(days=3)
+        ))
+        self.db_manager.session.commit()
+        self.assertTrue(self.db_manager.borrow_car(BORROWER, CARS[1]))
+        
+        self.assertGreaterEqual(self.db_manager.rebuild_rental_summaries(), 1)
+        summary = self._summary()
+        self.assertEqual((summary.rentals_count, summary.active_loans), (2, 1))
+        self.assertAlmostEqual(summary.total_days_rented, 3.0, places=3)
+        self.assertGreater(summary.last_rental_at, borrowed_at)
+    
+    def test_profile_shows_summary(self):
+        self.assertTrue(self.db_manager.borrow_car(BORROWER, CARS[0]))
+        client = app_module.app.test_client()
+        with client.session_transaction() as sess:
+            sess['user_id'] = self.user.id
+        response = client.get('/profile')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b'Rentals', response.data)
+        self.assertIn(b'Last rental on', response.data)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,76 @@
+"""
+Test script to verify read-replica routing
+"""
+import os
+import tempfile
+import unittest
+from unittest import mock
+from sqlalchemy import create_engine
+import app as app_module
+import db_manager
+from db_manager import DatabaseManager
+from models import Base
+from Car import RentalCars
+
+class TestReplicaRouting(unittest.TestCase):
+    def setUp(self):
+        """Use two separate SQLite files as primary and (never replicated) replica"""
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.primary = create_engine('sqlite:///' + os.path.join(self.tmpdir.name, 'primary.db'))
+        self.replica = create_engine('sqlite:///' + os.path.join(self.tmpdir.name, 'replica.db'))
+        for engine in (self.primary, self.replica):
+            Base.metadata.create_all(bind=engine)
+        self.patcher = mock.patch.multiple(
+            db_manager, _engine=self.primary, _replica_engine=self.replica,
+            REPLICA_URL='sqlite:///replica.db', database_available=True
+        )
+        self.patcher.start()
+    
+    def tearDown(self):
+        """Restore the real engine and remove the test databases"""
+        self.patcher.stop()
+        self.primary.dispose()
+        self.replica.dispose()
+        self.tmpdir.cleanup()
+    
+    def test_reads_go_to_replica_until_write(self):
+        """Plain reads use the replica; a write pins the session to the primary"""
+        writer = DatabaseManager()
+        try:
+            self.assertEqual(writer.get_available_cars(), [])
+            self.assertTrue(writer.borrow_car("Replica Borrower", "Replica Car"))
+            self.assertTrue(writer.wrote)
+            self.assertEqual(len(writer.get_borrowed_cars()), 1)
+        finally:
+            writer.close()
+        
+        reader = DatabaseManager()
+        try:
+            self.assertEqual(reader.get_borrowed_cars(), [])
+            self.assertFalse(reader.wrote)
+        finally:
+            reader.close()
+    
+    def test_client_reads_own_writes(self):
+        """After a borrow, the same client's next request reads from the primary"""
+        client = app_module.create_app().test_client()
+        payload = {'borrower_name': "Replica Borrower", 'car_name': "Replica Car"}
+        self.assertEqual(client.post('/api/v1/borrow', json=payload).status_code, 200)
+        borrowed = client.get('/api/v1/history').get_json()['borrowed']
+        self.assertEqual([r['car_name'] for r in borrowed], ["Replica Car"])
+        
+        other_client = app_module.create_app().test_client()
+        self.assertEqual(other_client.get('/api/v1/history').get_json()['borrowed'], [])
+    
+    def test_fleet_snapshot_reloads_from_primary(self):
+        """The availability snapshot never caches what a lagging replica shows"""
+        rental = RentalCars(["Replica Car"])
+        self.assertEqual(rental.get_available_car_names(), ["Replica Car"])
+        self.assertTrue(rental.borrowCars("Replica Borrower", "Replica Car"))
+        self.assertEqual(rental.get_available_car_names(), [])
+        self.assertTrue(rental.returnCars("Replica Borrower", "Replica Car"))
+        # The replica never saw the car at all
+        self.assertEqual(rental.get_available_car_names(), ["Replica Car"])
+
+if __name__ == '__main__':
+    unittest.main()
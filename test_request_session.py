@@ -0,0 +1,40 @@
+"""
+Test script to verify one database session is used per request
+"""
+import unittest
+from unittest import mock
+import app as app_module
+from db_manager import DatabaseManager
+
+class TestRequestSession(unittest.TestCase):
+    def setUp(self):
+        """Set up Flask test client"""
+        app_module.app.config['TESTING'] = True
+        self.client = app_module.app.test_client()
+    
+    def test_single_manager_per_request(self):
+        """Each page should open at most one DatabaseManager"""
+        created = []
+        original_init = DatabaseManager.__init__
+        
+        def tracking_init(manager):
+            original_init(manager)
+            created.append(manager)
+        
+        with mock.patch.object(DatabaseManager, '__init__', tracking_init):
+            for path in ['/', '/list', '/borrow', '/return', '/track']:
+                created.clear()
+                response = self.client.get(path)
+                self.assertEqual(response.status_code, 200, path)
+                self.assertLessEqual(len(created), 1, path)
+    
+    def test_manager_released_after_request(self):
+        """The request-scoped manager should not outlive the app context"""
+        with app_module.app.test_request_context('/'):
+            manager = app_module.get_db_manager()
+            self.assertIs(manager, app_module.get_db_manager())
+        with app_module.app.test_request_context('/'):
+            self.assertIsNot(manager, app_module.get_db_manager())
+
+if __name__ == '__main__':
+    unittest.main()
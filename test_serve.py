@@ -0,0 +1,83 @@
+"""
+Test script to verify the production launcher's sizing and fork handling
+"""
+import os
+import subprocess
+import sys
+import unittest
+from unittest import mock
+import db_manager as db
+import serve
+
+class TestServe(unittest.TestCase):
+    def test_default_workers(self):
+        self.assertEqual(serve.default_workers(4), 9)
+    
+    def test_unlimited_database_keeps_threads(self):
+        settings = serve.plan(workers=9, threads=4, connection_limit=None, job_workers=0)
+        self.assertEqual((settings['threads'], settings['pool_size'], settings['max_overflow']), (4, 4, 0))
+    
+    def test_threads_fit_connection_limit(self):
+        """Workers x threads never exceeds the connections left after the reserve"""
+        settings = serve.plan(workers=9, threads=8, connection_limit=100, reserved=10, job_workers=0)
+        self.assertEqual(settings['threads'], 8)
+        settings = serve.plan(workers=9, threads=16, connection_limit=100, reserved=10, job_workers=0)
+        self.assertEqual(settings['threads'], 10)
+        self.assertLessEqual(settings['connections'], 90)
+        settings = serve.plan(workers=200, threads=4, connection_limit=100, reserved=10, job_workers=0)
+        self.assertEqual((settings['workers'], settings['threads']), (90, 1))
+        self.assertLessEqual(settings['connections'], 90)
+        settings = serve.plan(workers=200, threads=4, connection_limit=100, reserved=10, job_workers=2)
+        self.assertEqual((settings['workers'], settings['threads'], settings['pool_size']), (30, 1, 3))
+        self.assertLessEqual(settings['connections'], 90)
+    
+    def test_too_small_connection_limit_is_an_error(self):
+        with self.assertRaises(ValueError):
+            serve.plan(workers=4, threads=4, connection_limit=12, reserved=10, job_workers=2)
+
+    def test_job_threads_count_against_the_pool(self):
+        """Each worker's background job threads get pool connections too"""
+        settings = serve.plan(workers=9, threads=4, connection_limit=None, job_workers=2)
+        self.assertEqual((settings['threads'], settings['pool_size'], settings['connections']), (4, 6, 54))
+        settings = serve.plan(workers=9, threads=16, connection_limit=100, reserved=10, job_workers=2)
+        self.assertEqual((settings['threads'], settings['pool_size']), (8, 10))
+        self.assertLessEqual(settings['connections'], 90)
+    
+    def test_sqlite_has_no_connection_limit(self):
+        self.assertIsNone(serve.database_connection_limit('sqlite:///car_rental.db'))
+    
+    def test_print_config_sets_pool_size(self):
+        saved = {key: os.environ.get(key) for key in ('DB_POOL_SIZE', 'DB_MAX_OVERFLOW')}
+        try:
+            with mock.patch('serve.database_connection_limit', return_value=None), \
+                    mock.patch('serve.JOB_WORKERS', 0), \
+                    mock.patch('builtins.print') as printed:
+                self.assertEqual(serve.serve(['--workers', '2', '--threads', '3', '--print-config']), 0)
+            self.assertIn('"pool_size": 3', printed.call_args[0][0])
+            self.assertEqual((os.environ['DB_POOL_SIZE'], os.environ['DB_MAX_OVERFLOW']), ('3', '0'))
+        finally:
+            for key, value in saved.items():
+                if value is None:
+                    os.environ.pop(key, None)
+                else:
+                    os.environ[key] = value
+    
+    def test_master_does_not_import_the_app(self):
+        """Workers import db_manager fresh, so SIGHUP picks up its changes"""
+        code = ("import sys, serve; serve.serve(['--workers', '1', '--print-config']); "
+                "assert 'db_manager' not in sys.modules and 'models' not in sys.modules")
+        result = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True,
+                                env=dict(os.environ, DATABASE_URL='sqlite:///unused.db'))
+        self.assertEqual(result.returncode, 0, result.stderr)
+    
+    def test_dispose_engines_after_fork(self):
+        """Disposing keeps the engine usable with fresh connections"""
+        engine = db.get_engine()
+        with engine.connect():
+            pass
+        db.dispose_engines()
+        with engine.connect() as conn:
+            self.assertEqual(conn.exec_driver_sql('SELECT 1').scalar(), 1)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,52 @@
+"""
+Test script to verify the slow-query log
+"""
+import unittest
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import Session
+import slow_query_log
+from db_manager import DatabaseManager
+from models import Base
+
+class TestSlowQueryLog(unittest.TestCase):
+    def setUp(self):
+        """Set up a private in-memory database where every query counts as slow"""
+        self.engine = create_engine('sqlite://')
+        Base.metadata.create_all(bind=self.engine)
+        slow_query_log.install(self.engine, 0)
+        self.db_manager = DatabaseManager()
+        self.db_manager.session.close()
+        self.db_manager.session = Session(bind=self.engine)
+    
+    def tearDown(self):
+        """Close the private database"""
+        self.db_manager.close()
+        self.engine.dispose()
+    
+    def test_logs_caller_shape_and_plan(self):
+        """Slow statements are logged with caller, parameter types and a one-off plan"""
+        with self.assertLogs('slow_query', 'WARNING') as logs:
+            self.db_manager.get_returned_cars_by_user(42, limit=5)
+            self.db_manager.get_returned_cars_by_user(42, limit=5)
+        output = '\n'.join(logs.output)
+        self.assertIn('in get_returned_cars_by_user', output)
+        self.assertIn("'int'", output)
+        self.assertNotIn('42', output.split('parameters:')[1].split('\n')[0])
+        self.assertEqual(output.count('Plan for slow query'), 1)
+    
+    def test_failed_explain_keeps_transaction(self):
+        """A failing EXPLAIN does not undo or abort the caller's transaction"""
+        with self.engine.connect() as conn:
+            conn.execute(text("INSERT INTO borrowers (name) VALUES ('Explain Borrower')"))
+            with self.assertRaises(Exception):
+                slow_query_log.explain(conn, 'SELECT * FROM no_such_table', ())
+            self.assertEqual(conn.execute(text("SELECT COUNT(*) FROM borrowers")).scalar(), 1)
+            conn.commit()
+    
+    def test_parameter_shape(self):
+        """Only parameter types are reported"""
+        self.assertEqual(slow_query_log.parameter_shape({'a': 1, 'b': 'x'}), {'a': 'int', 'b': 'str'})
+        self.assertEqual(slow_query_log.parameter_shape((1, None)), ['int', 'NoneType'])
+
+if __name__ == '__main__':
+    unittest.main()
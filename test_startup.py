@@ -0,0 +1,37 @@
+"""
+Test script to verify application startup does not touch the database
+"""
+import os
+import subprocess
+import sys
+import unittest
+import app as app_module
+
+class TestStartup(unittest.TestCase):
+    def test_import_does_not_connect(self):
+        """Importing the app must not create the engine, even with an unreachable database"""
+        env = dict(os.environ, DATABASE_URL='postgresql://nobody@10.255.255.1:5432/unreachable')
+        result = subprocess.run(
+            [sys.executable, '-c', 'import app, db_manager; print(db_manager._engine is None)'],
+            capture_output=True, text=True, env=env, timeout=30,
+            cwd=os.path.dirname(os.path.abspath(__file__))
+        )
+        self.assertEqual(result.returncode, 0, result.stderr)
+        self.assertEqual(result.stdout.strip(), 'True')
+    
+    def test_create_app_returns_new_app(self):
+        """The factory builds independent, configurable apps"""
+        test_app = app_module.create_app({'TESTING': True})
+        self.assertTrue(test_app.config['TESTING'])
+        self.assertIsNot(test_app, app_module.app)
+        self.assertIn('main.track_cars', test_app.view_functions)
+    
+    def test_init_db_command(self):
+        """The opt-in bootstrap command creates the schema and seeds cars"""
+        runner = app_module.app.test_cli_runner()
+        result = runner.invoke(args=['init-db'])
+        self.assertEqual(result.exit_code, 0, result.output)
+        self.assertIn('Initialized the database', result.output)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,55 @@
+"""
+Shared clean-up for tests that write named rows to the shared database
+"""
+import os
+import shutil
+import tempfile
+from contextlib import contextmanager
+from unittest import mock
+from sqlalchemy import create_engine
+import maintenance
+from db_manager import DatabaseManager
+from models import Base
+
+def remove_test_data(borrowers=(), cars=(), emails=()):
+    """Delete test borrowers, cars and user accounts (by email) with all of their records"""
+    maintenance.purge_borrowers(borrowers)
+    db_manager = DatabaseManager()
+    try:
+        user_ids = [user.id for user in map(db_manager.get_user_by_email, emails) if user is not None]
+    finally:
+        db_manager.close()
+    for user_id in user_ids:
+        maintenance.purge_user(user_id)
+    maintenance.purge_cars(cars)
+
+@contextmanager
+def temporary_database():
+    """Point the app's shared engine at a fresh SQLite file for the duration.
+
+    For tests of operations that touch every row of a table (archiving,
+    say), which must not run on the shared development database.
+    """
+    directory = tempfile.mkdtemp()
+    engine = create_engine(f"sqlite:///{os.path.join(directory, 'test.db')}")
+    try:
+        Base.metadata.create_all(bind=engine)
+        with mock.patch('db_manager._engine', engine), mock.patch('db_manager.get_replica_engine', return_value=None):
+            yield engine
+    finally:
+        engine.dispose()
+        shutil.rmtree(directory)
+
+class TestDataCleanup:
+    """TestCase mixin: set test_borrowers, test_cars and test_emails, and call
+    _remove_test_data() in setUp and tearDown"""
+    test_borrowers = ()
+    test_cars = ()
+    test_emails = ()
+
+    def _remove_test_data(self):
+        db_manager = getattr(self, 'db_manager', None)
+        if db_manager is not None:
+            # Let the purge's own connection write without waiting on this one
+            db_manager.session.rollback()
+        remove_test_data(self.test_borrowers, self.test_cars, self.test_emails)
@@ -0,0 +1,83 @@
+"""
+Test script to verify keyset pagination of rental history
+"""
+import os
+import shutil
+import tempfile
+import unittest
+from datetime import datetime, timedelta
+from sqlalchemy import Column, DateTime, Integer, MetaData, Table, create_engine, text
+import app as app_module
+from db_manager import DatabaseManager, fill_missing_timestamps
+from models import ReturnedCar
+from test_support import TestDataCleanup
+
+class TestTrackPagination(TestDataCleanup, unittest.TestCase):
+    test_borrowers = ("Pager Borrower",)
+    test_cars = ("Pager Car",)
+    test_emails = ("pager@example.com",)
+    
+    def setUp(self):
+        """Create a user with five returns, two sharing a timestamp"""
+        self.db_manager = DatabaseManager()
+        self._remove_test_data()
+        self.user = self.db_manager.create_user(name="Pager", email="pager@example.com")
+        borrower = self.db_manager.add_borrower("Pager Borrower", user_id=self.user.id)
+        car = self.db_manager.get_or_create_car("Pager Car")
+        base = datetime.now().replace(microsecond=0) - timedelta(days=10)
+        for offset in [0, 1, 2, 2, 3]:
+            self.db_manager.session.add(ReturnedCar(
+                borrower_id=borrower.id, car_id=car.id,
+                borrowed_at=base, returned_at=base + timedelta(days=offset)
+            ))
+        self.db_manager.session.commit()
+    
+    def tearDown(self):
+        """Clean up test data"""
+        self._remove_test_data()
+        self.db_manager.close()
+    
+    def test_pages_cover_history_once(self):
+        """Walking the cursors visits every row exactly once, newest first"""
+        from db_manager import next_cursor
+        seen = []
+        cursor = None
+        while True:
+            page = self.db_manager.get_returned_cars_by_user(self.user.id, limit=2, cursor=cursor)
+            seen.extend(page)
+            cursor = next_cursor(page, 2, 'returned_at')
+            if cursor is None:
+                break
+        self.assertEqual(len(seen), 5)
+        self.assertEqual(len({r.id for r in seen}), 5)
+        keys = [(r.returned_at, r.id) for r in seen]
+        self.assertEqual(keys, sorted(keys, reverse=True))
+    
+    def test_track_rejects_bad_cursor(self):
+        """A malformed cursor is a client error"""
+        client = app_module.app.test_client()
+        self.assertEqual(client.get('/track?returned_cursor=garbage').status_code, 400)
+        self.assertEqual(client.get('/track?limit=2').status_code, 200)
+
+class TestFillMissingTimestamps(unittest.TestCase):
+    def test_backfills_null_history_timestamps(self):
+        """Rows from before the columns were NOT NULL get a cursor-safe timestamp"""
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        engine = create_engine(f"sqlite:///{os.path.join(directory, 'old.db')}")
+        old = MetaData()
+        Table('returned_cars', old, Column('id', Integer, primary_key=True),
+              Column('borrowed_at', DateTime), Column('returned_at', DateTime))
+        old.create_all(engine)
+        with engine.begin() as conn:
+            conn.execute(text("INSERT INTO returned_cars (borrowed_at) VALUES ('2024-01-02 03:04:05'), (NULL)"))
+        self.assertEqual(fill_missing_timestamps(engine), 2)
+        with engine.connect() as conn:
+            returned = [row[0] for row in conn.execute(text("SELECT returned_at FROM returned_cars ORDER BY id"))]
+        self.assertEqual(returned[0], '2024-01-02 03:04:05')
+        self.assertIsNotNone(returned[1])
+        self.assertEqual(fill_missing_timestamps(engine), 0)
+        engine.dispose()
+
+if __name__ == '__main__':
+    unittest.main()